@@ -8,6 +8,7 @@ and all core components required for the bot to function.
 import asyncio
 import time
 import logging
+from functools import partial
 from logging.handlers import RotatingFileHandler
 from typing import List
 
@@ -44,6 +45,27 @@ config.check()
 tasks: List = []
 boot: float = time.time()
 
+# Initialize bounded worker pools for blocking work (downloads, extraction, thumbnails)
+# Render processes are forked here, before any other thread exists
+from HasiiMusic.core import render
+from HasiiMusic.core.executors import Executors
+executors = Executors(
+    config.DOWNLOAD_WORKERS,
+    config.EXTRACT_WORKERS,
+    config.RENDER_WORKERS,
+    render_processes=config.RENDER_PROCESSES,
+    render_init=partial(render.warm, config.THUMB_FORMAT, config.THUMB_QUALITY),
+)
+
+# Initialize shared HTTP client (keep-alive pool for thumbnails, cookies, etc.)
+from HasiiMusic.core.http import HTTPClient
+http = HTTPClient(
+    config.HTTP_CONNECTIONS,
+    config.HTTP_CONNECTIONS_PER_HOST,
+    config.HTTP_TIMEOUT,
+    config.HTTP_RETRIES,
+)
+
 # Initialize bot client
 from HasiiMusic.core.bot import Bot
 app = Bot()
@@ -52,6 +74,14 @@ app = Bot()
 from HasiiMusic.core.dir import ensure_dirs
 ensure_dirs()
 
+# Initialize size-bounded cache for generated thumbnails in cache/ (queued tracks are never evicted)
+from HasiiMusic.core.cache import FileCache
+thumb_cache = FileCache(
+    "cache",
+    config.THUMB_CACHE_LIMIT,
+    pinned=lambda: {f"{video_id}_modern" for video_id in queue.active_ids()},
+)
+
 # Initialize userbot/assistant clients
 from HasiiMusic.core.userbot import Userbot
 userbot = Userbot()
@@ -60,10 +90,32 @@ userbot = Userbot()
 from HasiiMusic.core.mongo import MongoDB
 db = MongoDB()
 
+# Initialize chat metadata cache (chat type, channel play routing, assistant membership)
+from HasiiMusic.core.chats import ChatCache
+chat_cache = ChatCache(config.CHAT_CACHE_TTL)
+# Cached channel -> group routing may point at the old group after /channelplay
+db.on_cmode_change = chat_cache.invalidate_channels
+
+# Initialize Telegram file_id map for uploaded thumbnails
+from HasiiMusic.core.photos import PhotoIds
+photo_ids = PhotoIds(db)
+
 # Initialize language system
 from HasiiMusic.core.lang import Language
 lang = Language()
 
+# Initialize queue manager
+from HasiiMusic.helpers import Queue
+queue = Queue()
+
+# Initialize size-bounded cache for downloads/ (queued files are never evicted)
+cache = FileCache(
+    "downloads",
+    config.CACHE_LIMIT,
+    policy=config.CACHE_POLICY,
+    pinned=queue.active_ids,
+)
+
 # Initialize Telegram and YouTube utilities
 from HasiiMusic.core.telegram import Telegram
 from HasiiMusic.core.youtube import YouTube
@@ -72,15 +124,9 @@ yt = YouTube()
 
 # Initialize preload manager for background track downloading
 from HasiiMusic.core.preload import PreloadManager
-preload = PreloadManager()
-
-# Initialize queue manager
-from HasiiMusic.helpers import Queue
-queue = Queue()
-
-# Initialize preload manager for next-track downloading
-from HasiiMusic.helpers._preload import PreloadManager
-preload = PreloadManager()
+preload = PreloadManager(
+    config.PRELOAD_DEPTH, config.PRELOAD_BUDGET, config.PRELOAD_AHEAD, config.PRELOAD_MAX_JOBS
+)
 
 # Initialize call handler
 from HasiiMusic.core.calls import TgCall
@@ -121,5 +167,11 @@ async def stop() -> None:
     await app.exit()
     await userbot.exit()
     await db.close()
+    await http.close()
+
+    # Persist cache access times so warm files survive the restart
+    cache.save()
+    thumb_cache.save()
+    executors.shutdown()
     
     logger.info("✅ Bot stopped successfully.\n")
@@ -16,7 +16,7 @@ import importlib
 from pyrogram import idle
 
 from HasiiMusic import (tune, app, config, db,
-                   logger, stop, userbot, yt)
+                   logger, stop, tasks, userbot, yt)
 from HasiiMusic.plugins import all_modules
 
 
@@ -50,11 +50,17 @@ async def main():
             logger.error(f"Failed to start tournament timer: {e}")
 
         # Step 6: Download YouTube cookies if URLs are provided (for age-restricted videos)
+        # Runs in the background and re-fetches every COOKIE_REFRESH minutes
         if config.COOKIES_URL:
-            try:
-                await yt.save_cookies(config.COOKIES_URL)
-            except Exception as e:
-                logger.error(f"Failed to download cookies: {e}")
+            tasks.append(asyncio.create_task(
+                yt.refresh_cookies(config.COOKIES_URL, config.COOKIE_REFRESH)
+            ))
+
+        # Step 6.5: Keep resolved live/direct stream URLs fresh while queued
+        tasks.append(asyncio.create_task(yt.streams.refresher()))
+
+        # Step 6.6: Prepare next tracks shortly before the current ones end
+        tasks.append(asyncio.create_task(tune.transitions.watcher()))
 
         # Step 7: Load sudo users and blacklisted users from database
         sudoers = await db.get_sudoers()
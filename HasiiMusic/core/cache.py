@@ -0,0 +1,253 @@
+# ==============================================================================
+# cache.py - Size-Bounded Media File Cache
+# ==============================================================================
+# This module keeps the downloads/ directory under a fixed byte budget.
+#
+# Features:
+# - Files are content-addressed by video/file ID (downloads/{id}.{ext})
+# - LRU or LFU eviction once the directory grows past its budget
+# - Small on-disk JSON index with access times and hit counts
+# - Files that are playing or queued in any chat are never evicted
+# - Index survives restarts, so popular tracks stay warm
+# ==============================================================================
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from HasiiMusic import logger
+
+
+class FileCache:
+    """
+    Tracks files in a directory and evicts cold ones when over budget.
+
+    Keys are file names inside the directory. The part of the name before
+    the first dot is the content ID (video ID or Telegram file_unique_id),
+    which is what pinning works on.
+    """
+
+    INDEX_NAME = ".index.json"
+    SAVE_INTERVAL = 60  # Seconds between index writes caused by cache hits
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        policy: str = "lru",
+        pinned: Optional[Callable[[], Set[str]]] = None,
+    ):
+        """
+        Initialize the cache and load the index from disk.
+
+        Args:
+            directory: Directory holding the cached files
+            max_bytes: Byte budget for the directory (0 disables eviction)
+            policy: "lru" (least recently used) or "lfu" (least frequently used)
+            pinned: Callable returning content IDs that must not be evicted
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.policy = policy if policy in ("lru", "lfu") else "lru"
+        self._pinned = pinned
+
+        # {file_name: {"size": int, "atime": float, "hits": int}}
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._last_save = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.load()
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / self.INDEX_NAME
+
+    @staticmethod
+    def content_id(name: str) -> str:
+        """Return the content ID (text before the first dot) of a file name."""
+        return name.split(".", 1)[0]
+
+    def _cacheable(self, name: str) -> bool:
+        """Skip the index, hidden files, in-progress downloads and sidecars."""
+        return not name.startswith(".") and not name.endswith((".part", ".ytdl", ".tmp", ".json"))
+
+    def load(self) -> None:
+        """Load the index and reconcile it with what is actually on disk."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+
+        entries = {}
+        for item in os.scandir(self.directory):
+            if not item.is_file() or not self._cacheable(item.name):
+                continue
+            stat = item.stat()
+            old = saved.get(item.name, {})
+            entries[item.name] = {
+                "size": stat.st_size,
+                "atime": old.get("atime", stat.st_mtime),
+                "hits": old.get("hits", 0),
+            }
+
+        self._entries = entries
+        self._dirty = True
+        self.save()
+        logger.info(
+            f"🗄️ Cache loaded: {len(entries)} file(s), "
+            f"{self.total_bytes / 1024 ** 2:.1f}MB in {self.directory}/"
+        )
+
+    def save(self, force: bool = True) -> None:
+        """
+        Write the index to disk atomically.
+
+        Args:
+            force: Write even if the last save was less than SAVE_INTERVAL ago
+        """
+        if not self._dirty:
+            return
+        now = time.time()
+        if not force and now - self._last_save < self.SAVE_INTERVAL:
+            return
+        tmp = self.index_path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.index_path)
+            self._dirty = False
+            self._last_save = now
+        except OSError as e:
+            logger.warning(f"Could not write cache index {self.index_path}: {e}")
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def lookup(self, name: str) -> Optional[str]:
+        """
+        Return the path of a cached file and record the access, or None.
+
+        Args:
+            name: File name inside the cache directory
+        """
+        path = self.directory / name
+        if not path.exists():
+            self._entries.pop(name, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.touch(name)
+        return str(path)
+
+    def touch(self, name: str) -> None:
+        """Record an access to a file (adds it to the index if unknown)."""
+        name = Path(name).name
+        entry = self._entries.get(name)
+        if entry is None:
+            path = self.directory / name
+            if not path.exists() or not self._cacheable(name):
+                return
+            entry = {"size": path.stat().st_size, "atime": 0.0, "hits": 0}
+            self._entries[name] = entry
+        entry["atime"] = time.time()
+        entry["hits"] += 1
+        self._dirty = True
+        self.save(force=False)
+
+    def add(self, path: str) -> None:
+        """
+        Register a newly written file and evict cold files if over budget.
+
+        Args:
+            path: Path of the new file (must be inside the cache directory)
+        """
+        name = Path(path).name
+        try:
+            size = (self.directory / name).stat().st_size
+        except OSError:
+            return
+        self._entries[name] = {"size": size, "atime": time.time(), "hits": 0}
+        self._dirty = True
+        self.enforce()
+        self.save()
+
+    def discard(self, path: str) -> None:
+        """Forget a file and delete it (and its .json sidecar) from disk."""
+        name = Path(path).name
+        self._entries.pop(name, None)
+        self._dirty = True
+        for leftover in (name, f"{name}.json"):
+            try:
+                os.remove(self.directory / leftover)
+            except OSError:
+                pass
+
+    def _pinned_ids(self) -> Set[str]:
+        if not self._pinned:
+            return set()
+        try:
+            return set(self._pinned())
+        except Exception as e:
+            logger.debug(f"Could not read pinned cache entries: {e}")
+            return set()
+
+    def enforce(self) -> int:
+        """
+        Evict unpinned files until the directory is back under budget.
+
+        Evicts down to 90% of the budget so that every new download does
+        not trigger another eviction round.
+
+        Returns:
+            int: Number of bytes freed
+        """
+        total = self.total_bytes
+        if not self.max_bytes or total <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * 0.9)
+        pinned = self._pinned_ids()
+        if self.policy == "lfu":
+            order = lambda n: (self._entries[n]["hits"], self._entries[n]["atime"])
+        else:
+            order = lambda n: self._entries[n]["atime"]
+
+        freed = 0
+        for name in sorted(self._entries, key=order):
+            if total - freed <= target:
+                break
+            if self.content_id(name) in pinned:
+                continue
+            size = self._entries[name]["size"]
+            self.discard(name)
+            freed += size
+            self.evictions += 1
+
+        if freed:
+            logger.info(
+                f"🧹 Cache evicted {freed / 1024 ** 2:.1f}MB from {self.directory}/ "
+                f"({(total - freed) / 1024 ** 2:.1f}MB / {self.max_bytes / 1024 ** 2:.0f}MB)"
+            )
+        elif total > self.max_bytes:
+            logger.warning(f"Cache over budget but every file in {self.directory}/ is pinned")
+        return freed
+
+    def stats(self) -> dict:
+        """Return cache counters for monitoring."""
+        return {
+            "files": len(self._entries),
+            "bytes": self.total_bytes,
+            "budget": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
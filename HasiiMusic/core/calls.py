@@ -13,6 +13,7 @@
 
 import asyncio
 import logging
+import os
 from ntgcalls import ConnectionNotFound, TelegramServerError
 from pyrogram import enums, errors
 from pyrogram.errors import MessageIdInvalid
@@ -20,7 +21,11 @@ from pyrogram.types import InputMediaPhoto, Message
 from pytgcalls import PyTgCalls, exceptions, types
 from pytgcalls.pytgcalls_session import PyTgCallsSession
 
-from HasiiMusic import app, config, db, lang, logger, preload, queue, userbot, yt
+from HasiiMusic import app, chat_cache, config, db, lang, logger, photo_ids, preload, queue, userbot, yt
+from HasiiMusic.core.progressive import DONE
+from HasiiMusic.core.scheduler import Priority
+from HasiiMusic.core.transcode import HEAVY_PROBE, LIGHT_PROBE
+from HasiiMusic.core.transitions import Prepared, TransitionEngine
 from HasiiMusic.helpers import Media, Track, buttons, thumb
 
 # Suppress pytgcalls harmless errors (library bugs - not critical)
@@ -42,24 +47,57 @@ class TgCall(PyTgCalls):
         self.clients = []
         self._play_next_locks = {}  # Lock to prevent concurrent play_next calls per chat
         self._stream_end_cache = {}  # Cache to prevent duplicate stream end processing
+        self.transitions = TransitionEngine(self, config.TRANSITION_LEAD)
 
-    async def _edit_media_with_retry(self, message: Message, media_obj: InputMediaPhoto, reply_markup):
-        """Edit media with basic FloodWait handling."""
+    async def message_chat(self, chat_id: int) -> int | None:
+        """
+        Return the group that gets control messages for a channel stream.
+
+        In channel play mode audio goes to the channel while messages go to
+        the group that started it. Returns None for ordinary group chats.
+        """
+        try:
+            return (await chat_cache.get(chat_id)).message_chat
+        except Exception:
+            return None
+
+    async def _edit_media(self, message: Message, media_obj: InputMediaPhoto, reply_markup) -> Message:
+        """Edit media, waiting out one FloodWait."""
         try:
             return await message.edit_media(media=media_obj, reply_markup=reply_markup)
         except errors.FloodWait as fw:
             await asyncio.sleep(fw.value + 1)
+            return await message.edit_media(media=media_obj, reply_markup=reply_markup)
+
+    async def _edit_media_with_retry(self, message: Message, media_obj: InputMediaPhoto, reply_markup):
+        """Edit media with basic FloodWait handling, by file_id if it was uploaded before."""
+        photo = media_obj.media
+        file_id = await photo_ids.get(photo)
+        if file_id:
+            media_obj.media = file_id
+        try:
+            edited = await self._edit_media(message, media_obj, reply_markup)
+        except errors.MessageNotModified:
+            return None
+        except errors.BadRequest as e:
+            if not file_id or not photo_ids.is_stale(e):
+                return None
+            # Stale file_id (e.g. the bot token changed): upload the file instead
+            await photo_ids.forget(photo)
+            media_obj.media = photo
+            file_id = None
             try:
-                return await message.edit_media(media=media_obj, reply_markup=reply_markup)
+                edited = await self._edit_media(message, media_obj, reply_markup)
             except Exception:
                 return None
-        except errors.MessageNotModified:
-            return None
         except Exception:
             return None
+        if not file_id:
+            await photo_ids.remember(photo, edited)
+        return edited
 
-    async def _send_photo_with_retry(self, chat_id: int, photo, caption: str, reply_markup):
-        """Send photo with FloodWait handling."""
+    async def _send_photo(self, chat_id: int, photo, caption: str, reply_markup) -> Message:
+        """Send photo, waiting out one FloodWait."""
         try:
             return await app.send_photo(
                 chat_id=chat_id,
@@ -69,17 +107,32 @@ class TgCall(PyTgCalls):
             )
         except errors.FloodWait as fw:
             await asyncio.sleep(fw.value + 1)
+            return await app.send_photo(
+                chat_id=chat_id,
+                photo=photo,
+                caption=caption,
+                reply_markup=reply_markup,
+            )
+
+    async def _send_photo_with_retry(self, chat_id: int, photo, caption: str, reply_markup):
+        """Send photo with FloodWait handling, by file_id if it was uploaded before."""
+        file_id = await photo_ids.get(photo)
+        if file_id:
             try:
-                return await app.send_photo(
-                    chat_id=chat_id,
-                    photo=photo,
-                    caption=caption,
-                    reply_markup=reply_markup,
-                )
+                return await self._send_photo(chat_id, file_id, caption, reply_markup)
+            except errors.BadRequest as e:
+                if not photo_ids.is_stale(e):
+                    return None
+                # Stale file_id (e.g. the bot token changed): upload the file again
+                await photo_ids.forget(photo)
             except Exception:
                 return None
+        try:
+            sent = await self._send_photo(chat_id, photo, caption, reply_markup)
         except Exception:
             return None
+        await photo_ids.remember(photo, sent)
+        return sent
 
     async def pause(self, chat_id: int) -> bool:
         client = await db.get_assistant(chat_id)
@@ -100,6 +153,9 @@ class TgCall(PyTgCalls):
         except Exception as e:
             logger.debug(f"Error cancelling preload for {chat_id}: {e}")
         
+        yt.playlists.cancel(chat_id)
+        self.transitions.cancel(chat_id)
+
         try:
             queue.clear(chat_id)
             await db.remove_call(chat_id)
@@ -126,6 +182,132 @@ class TgCall(PyTgCalls):
             ]):
                 logger.warning(f"Error leaving call for {chat_id}: {e}")
 
+    async def _stream(self, media: Media | Track, seek_time: int = 0) -> types.MediaStream:
+        """Build the MediaStream (source file and ffmpeg flags) for a track."""
+        # Live and direct streams: googlevideo URLs expire, so take the
+        # cached one (refreshed in the background) or resolve a new one
+        if isinstance(media, Track) and media.file_path.startswith("http"):
+            media.file_path = await yt.stream_url(media.id, live=media.is_live) or media.file_path
+
+        # Progressive downloads finish in the background; once yt-dlp has
+        # renamed the .part file, seeks and replays use the complete file
+        if media.file_path.endswith(".part") and not os.path.exists(media.file_path):
+            media.file_path = media.file_path[:-len(".part")]
+
+        # A transcoded copy replaces the download and needs no deep probing
+        probe = None
+        if isinstance(media, Track) and not media.file_path.startswith("http"):
+            media.file_path, probe = yt.transcoder.best(media.file_path)
+
+        # Configure audio stream with optimized buffering for lag-free playback
+        # PERFORMANCE FIX: Increased buffers prevent stuttering/lagging during playback
+        if seek_time > 1:
+            # Seeking: Still need buffers but skip to position first
+            ffmpeg_params = f"-ss {seek_time} -probesize 10M -analyzeduration 5M -rtbufsize 5M -fflags +genpts+igndts"
+        else:
+            # Normal playback with aggressive buffering:
+            # - probesize 10M: Large input buffer (prevents underruns)
+            # - analyzeduration 5M: Analyze more data (better format detection)
+            # - rtbufsize 5M: Real-time buffer (crucial for network streams)
+            # - fflags +genpts+igndts: Generate PTS, ignore DTS (smooth playback)
+            # - sync ext: External sync (reduces A/V desync)
+            ffmpeg_params = "-probesize 10M -analyzeduration 5M -rtbufsize 5M -fflags +genpts+igndts -sync ext"
+
+        if probe:
+            # Canonical Ogg/Opus file: the stream layout is already known
+            ffmpeg_params = ffmpeg_params.replace(HEAVY_PROBE, LIGHT_PROBE)
+
+        # Loudness normalization: gain measured once per video after download
+        if isinstance(media, Track) and not media.is_live:
+            gain = await yt.loudness.gain(media.id)
+            if gain:
+                # -atend places the filter after the input (output options)
+                ffmpeg_params += f" -atend -af volume={gain}dB"
+
+        media_path = media.file_path
+        if media.file_path.endswith(".part"):
+            # Growing file: ffmpeg reads it over loopback HTTP; the response
+            # ends as soon as the download has finished (or stalled)
+            media_path = await yt.feeds.open(media.file_path) or media.file_path
+        
+        return types.MediaStream(
+            media_path=media_path,
+            # PERFORMANCE FIX: Reduced from STUDIO to HIGH quality
+            # HIGH = 192kbps (vs STUDIO 320kbps) - better network stability, imperceptible quality difference
+            audio_parameters=types.AudioQuality.HIGH,
+            audio_flags=types.MediaStream.Flags.REQUIRED,
+            video_flags=types.MediaStream.Flags.IGNORE,
+            ffmpeg_parameters=ffmpeg_params,
+        )
+
+    async def _announce(
+        self,
+        chat_id: int,
+        target_chat: int,
+        media: Media | Track,
+        _thumb: str,
+        _lang: dict,
+        message: Message | None = None,
+    ) -> None:
+        """Send the now-playing card for a track that just started."""
+        await db.add_call(chat_id)
+        text = _lang["play_media"].format(
+            media.url,
+            media.title,
+            media.duration,
+            media.user,
+        )
+        # Create initial timer display
+        if not media.is_live and media.duration_sec:
+            import time as time_module
+            played = media.time  # Use actual media.time value
+            duration = media.duration_sec
+            # Build progress bar with original style
+            bar_length = 12
+            if duration == 0:
+                percentage = 0
+            else:
+                percentage = min((played / duration) * 100, 100)
+            filled = int(round(bar_length * percentage / 100))
+            timer_bar = "—" * filled + "●" + "—" * (bar_length - filled)
+            # Format time properly with hours support
+            if duration >= 3600:
+                played_time = time_module.strftime(
+                    '%H:%M:%S', time_module.gmtime(played))
+                total_time = time_module.strftime(
+                    '%H:%M:%S', time_module.gmtime(duration))
+            else:
+                played_time = time_module.strftime(
+                    '%M:%S', time_module.gmtime(played))
+                total_time = time_module.strftime(
+                    '%M:%S', time_module.gmtime(duration))
+            timer_text = f"{played_time} {timer_bar} {total_time}"
+            keyboard = buttons.controls(chat_id, timer=timer_text)
+        else:
+            keyboard = buttons.controls(chat_id)
+
+        if message:
+            try:
+                await message.delete()
+            except Exception:
+                pass
+
+        # Send new photo message to target chat (group in channel play mode, or same chat otherwise)
+        sent_photo = await self._send_photo_with_retry(
+            chat_id=target_chat,
+            photo=_thumb,
+            caption=text,
+            reply_markup=keyboard,
+        )
+        if sent_photo:
+            media.message_id = sent_photo.id
+
+        # ✨ NEW: Start preloading next tracks in background for seamless transitions
+        try:
+            asyncio.create_task(preload.start_preload(chat_id))
+        except Exception as e:
+            logger.debug(f"Error starting preload for {chat_id}: {e}")
+
     async def play_media(
         self,
         chat_id: int,
@@ -133,6 +315,7 @@ class TgCall(PyTgCalls):
         media: Media | Track,
         seek_time: int = 0,
         message_chat_id: int = None,
+        retry_url: bool = True,
     ) -> None:
         """Play media in voice chat.
         
@@ -143,6 +326,7 @@ class TgCall(PyTgCalls):
             seek_time: Position to seek to (seconds)
             message_chat_id: Where to send control messages (group chat in channel play mode)
                            If None, messages go to same chat as audio (chat_id)
+            retry_url: Re-resolve a rejected stream URL once before giving up
         """
         client = await db.get_assistant(chat_id)
         _lang = await lang.get_lang(chat_id)
@@ -151,6 +335,9 @@ class TgCall(PyTgCalls):
         # - If message_chat_id provided (channel play): send to group
         # - Otherwise: send to same chat as audio
         target_chat_for_messages = message_chat_id if message_chat_id else chat_id
+
+        # Playlist entries are queued as placeholders; complete them if preload didn't
+        media = await yt.materialize(media)
         
         # Generate thumbnail only if THUMB_GEN is enabled, otherwise use default
         if config.THUMB_GEN and isinstance(media, Track):
@@ -164,10 +351,10 @@ class TgCall(PyTgCalls):
             else:
                 logger.error(f"No file path for media in {chat_id}")
                 return
-        
+
         # Validate chat_id - check if it's a valid channel/group
         try:
-            chat = await app.get_chat(chat_id)
+            chat = await chat_cache.get(chat_id)
             if chat.type not in [enums.ChatType.SUPERGROUP, enums.ChatType.GROUP, enums.ChatType.CHANNEL]:
                 logger.error(f"Invalid chat type for {chat_id}: {chat.type}")
                 if message:
@@ -184,8 +371,8 @@ class TgCall(PyTgCalls):
                     return
                 
                 try:
-                    assistant_member = await app.get_chat_member(chat_id, userbot_client.me.id)
-                    if assistant_member.status == enums.ChatMemberStatus.BANNED:
+                    status = await chat_cache.member_status(chat_id, userbot_client.me.id)
+                    if status == enums.ChatMemberStatus.BANNED:
                         logger.error(f"Assistant banned in channel {chat_id}")
                         if message:
                             await message.edit_text("❌ ᴀꜱꜱɪꜱᴛᴀɴᴛ ɪꜱ ʙᴀɴɴᴇᴅ ɪɴ ᴛʜɪꜱ ᴄʜᴀɴɴᴇʟ.")
@@ -210,30 +397,8 @@ class TgCall(PyTgCalls):
                 return
             raise
 
-        # Configure audio stream with optimized buffering for lag-free playback
-        # PERFORMANCE FIX: Increased buffers prevent stuttering/lagging during playback
-        if seek_time > 1:
-            # Seeking: Still need buffers but skip to position first
-            ffmpeg_params = f"-ss {seek_time} -probesize 10M -analyzeduration 5M -rtbufsize 5M -fflags +genpts+igndts"
-        else:
-            # Normal playback with aggressive buffering:
-            # - probesize 10M: Large input buffer (prevents underruns)
-            # - analyzeduration 5M: Analyze more data (better format detection)
-            # - rtbufsize 5M: Real-time buffer (crucial for network streams)
-            # - fflags +genpts+igndts: Generate PTS, ignore DTS (smooth playback)
-            # - sync ext: External sync (reduces A/V desync)
-            ffmpeg_params = "-probesize 10M -analyzeduration 5M -rtbufsize 5M -fflags +genpts+igndts -sync ext"
-        
-        stream = types.MediaStream(
-            media_path=media.file_path,
-            # PERFORMANCE FIX: Reduced from STUDIO to HIGH quality
-            # HIGH = 192kbps (vs STUDIO 320kbps) - better network stability, imperceptible quality difference
-            audio_parameters=types.AudioQuality.HIGH,
-            audio_flags=types.MediaStream.Flags.REQUIRED,
-            video_flags=types.MediaStream.Flags.IGNORE,
-            ffmpeg_parameters=ffmpeg_params,
-        )
-        
+        stream = await self._stream(media, seek_time)
+
         # Check if already connected, if so leave first to avoid "Connection cannot be initialized more than once"
         try:
             # Check current call status
@@ -297,6 +462,8 @@ class TgCall(PyTgCalls):
                         # Different error, don't retry
                         raise
                 
+            self.transitions.started(chat_id, fast=False)
+
             # Initialize media.time based on seek position
             if seek_time:
                 media.time = seek_time
@@ -304,63 +471,7 @@ class TgCall(PyTgCalls):
                 media.time = 1
 
             if not seek_time:
-                await db.add_call(chat_id)
-                text = _lang["play_media"].format(
-                    media.url,
-                    media.title,
-                    media.duration,
-                    media.user,
-                )
-                # Create initial timer display
-                if not media.is_live and media.duration_sec:
-                    import time as time_module
-                    played = media.time  # Use actual media.time value
-                    duration = media.duration_sec
-                    # Build progress bar with original style
-                    bar_length = 12
-                    if duration == 0:
-                        percentage = 0
-                    else:
-                        percentage = min((played / duration) * 100, 100)
-                    filled = int(round(bar_length * percentage / 100))
-                    timer_bar = "—" * filled + "●" + "—" * (bar_length - filled)
-                    # Format time properly with hours support
-                    if duration >= 3600:
-                        played_time = time_module.strftime(
-                            '%H:%M:%S', time_module.gmtime(played))
-                        total_time = time_module.strftime(
-                            '%H:%M:%S', time_module.gmtime(duration))
-                    else:
-                        played_time = time_module.strftime(
-                            '%M:%S', time_module.gmtime(played))
-                        total_time = time_module.strftime(
-                            '%M:%S', time_module.gmtime(duration))
-                    timer_text = f"{played_time} {timer_bar} {total_time}"
-                    keyboard = buttons.controls(chat_id, timer=timer_text)
-                else:
-                    keyboard = buttons.controls(chat_id)
-                
-                if message:
-                    try:
-                        await message.delete()
-                    except Exception:
-                        pass
-                
-                # Send new photo message to target chat (group in channel play mode, or same chat otherwise)
-                sent_photo = await self._send_photo_with_retry(
-                    chat_id=target_chat_for_messages,
-                    photo=_thumb,
-                    caption=text,
-                    reply_markup=keyboard,
-                )
-                if sent_photo:
-                    media.message_id = sent_photo.id
-                
-                # ✨ NEW: Start preloading next tracks in background for seamless transitions
-                try:
-                    asyncio.create_task(preload.start_preload(chat_id, count=2))
-                except Exception as e:
-                    logger.debug(f"Error starting preload for {chat_id}: {e}")
+                await self._announce(chat_id, target_chat_for_messages, media, _thumb, _lang, message)
         except FileNotFoundError:
             if message:
                 try:
@@ -403,6 +514,14 @@ class TgCall(PyTgCalls):
                 logger.error(f"RPC error in play_media for {chat_id}: {e}")
                 await self.stop(chat_id)
         except exceptions.NoAudioSourceFound:
+            # A stream URL that ffmpeg cannot open was most likely rejected
+            # (HTTP 403); drop it and try once more with a fresh one
+            if retry_url and isinstance(media, Track) and media.file_path.startswith("http"):
+                logger.info(f"Stream URL for {media.id} rejected, resolving a new one")
+                yt.streams.invalidate(media.id)
+                return await self.play_media(
+                    chat_id, message, media, seek_time, message_chat_id, retry_url=False
+                )
             if message:
                 try:
                     await message.edit_text(_lang["error_no_audio"])
@@ -448,16 +567,7 @@ class TgCall(PyTgCalls):
                 return
 
             # Detect channel play mode for proper message routing
-            message_chat_id = None  # Default: messages to same chat
-            try:
-                chat = await app.get_chat(chat_id)
-                if chat.type == enums.ChatType.CHANNEL:
-                    # Channel play detected - find the group that initiated it
-                    group_id = await db.get_group_for_channel(chat_id)
-                    if group_id:
-                        message_chat_id = group_id
-            except Exception:
-                pass
+            message_chat_id = await self.message_chat(chat_id)
 
             media = queue.get_current(chat_id)
             _lang = await lang.get_lang(chat_id)
@@ -481,16 +591,7 @@ class TgCall(PyTgCalls):
             _lang = await lang.get_lang(chat_id)
             
             # Detect channel play mode for proper message routing
-            message_chat_id = None  # Default: messages to same chat
-            try:
-                chat = await app.get_chat(chat_id)
-                if chat.type == enums.ChatType.CHANNEL:
-                    # Channel play detected - find the group that initiated it
-                    group_id = await db.get_group_for_channel(chat_id)
-                    if group_id:
-                        message_chat_id = group_id
-            except Exception:
-                pass
+            message_chat_id = await self.message_chat(chat_id)
             
             # Update media time
             media.time = seconds
@@ -516,6 +617,81 @@ class TgCall(PyTgCalls):
             logger.warning(f"Seek stream failed for {chat_id}: {e}")
             return False
 
+    async def resume_progressive(self, chat_id: int) -> bool:
+        """
+        Recover from a progressive stream that ran dry before the track ended.
+
+        The feed of a .part file ends the stream early when the download
+        stalls or fails. Instead of skipping to the next track, wait for
+        the full download and seek back to where playback stopped. A feed
+        that delivered the whole download ended normally.
+
+        Returns:
+            bool: True if playback was resumed, False to continue with play_next
+        """
+        media = queue.get_current(chat_id)
+        if not media or not media.file_path or not media.file_path.endswith(".part"):
+            return False
+        state = yt.feeds.state(media.file_path)
+        if state is None or state == DONE:
+            return False
+
+        logger.info(f"Progressive stream for {chat_id} ended early, finishing download...")
+        file_path = await yt.download(media.id, priority=Priority.NEXT)
+        if not file_path:
+            return False
+        media.file_path = file_path
+        # media.time kept ticking while ffmpeg waited for data that never came
+        position = max(0, media.time - config.PROGRESSIVE_STALL)
+        return await self.seek_stream(chat_id, position)
+
+    async def _switch(
+        self, chat_id: int, media: Media | Track, prepared: Prepared, target_chat: int
+    ) -> bool:
+        """
+        Start a prepared track on the running call without rejoining it.
+
+        Only the stream swap is awaited; the now-playing card is sent after
+        the audio has started, so the gap is just the time client.play takes.
+
+        Returns:
+            bool: False if the swap failed and the regular path should run
+        """
+        client = await db.get_assistant(chat_id)
+        try:
+            stream = await self._stream(media)
+            await client.play(
+                chat_id=chat_id,
+                stream=stream,
+                config=types.GroupCallConfig(auto_start=True),
+            )
+        except Exception as e:
+            logger.debug(f"Gapless switch failed for {chat_id}, using the regular path: {e}")
+            return False
+
+        self.transitions.started(chat_id, fast=True)
+        media.time = 1
+        asyncio.create_task(self._after_switch(chat_id, media, prepared, target_chat))
+        return True
+
+    async def _after_switch(
+        self, chat_id: int, media: Media | Track, prepared: Prepared, target_chat: int
+    ) -> None:
+        """Replace the queued message with the now-playing card after a switch."""
+        try:
+            if media.message_id:
+                await app.delete_messages(
+                    chat_id=chat_id, message_ids=media.message_id, revoke=True
+                )
+                media.message_id = 0
+        except Exception as e:
+            logger.debug(f"Could not delete previous message in {chat_id}: {e}")
+        try:
+            _lang = await lang.get_lang(chat_id)
+            await self._announce(chat_id, target_chat, media, prepared.thumb, _lang)
+        except Exception as e:
+            logger.warning(f"Could not send now-playing message for {chat_id}: {e}")
+
     async def play_next(self, chat_id: int) -> None:
         # Acquire lock for this chat to prevent concurrent execution
         if chat_id not in self._play_next_locks:
@@ -533,17 +709,13 @@ class TgCall(PyTgCalls):
                 if not await db.get_call(chat_id):
                     return
 
-                # Detect channel play mode for proper message routing
-                message_chat_id = None  # Default: messages to same chat
-                try:
-                    chat = await app.get_chat(chat_id)
-                    if chat.type == enums.ChatType.CHANNEL:
-                        # Channel play detected - find the group that initiated it
-                        group_id = await db.get_group_for_channel(chat_id)
-                        if group_id:
-                            message_chat_id = group_id
-                except Exception:
-                    pass
+                # A transition prepared before the track ended already
+                # looked up the channel play routing
+                prepared = self.transitions.take(chat_id)
+                if prepared:
+                    message_chat_id = prepared.message_chat_id
+                else:
+                    message_chat_id = await self.message_chat(chat_id)
                 
                 # Determine target chat for messages
                 target_chat = message_chat_id if message_chat_id else chat_id
@@ -569,6 +741,13 @@ class TgCall(PyTgCalls):
                         return
                 
                 media = queue.get_next(chat_id)
+
+                # Queue the next playlist batch before the queue runs dry
+                if yt.playlists.pending(chat_id):
+                    if media:
+                        asyncio.create_task(yt.playlists.top_up(chat_id))
+                    elif await yt.playlists.top_up(chat_id):
+                        media = queue.get_current(chat_id)
                 
                 # If queue loop and no more tracks, start from beginning
                 if not media and loop_mode == 10:
@@ -581,7 +760,10 @@ class TgCall(PyTgCalls):
                             msg = await app.send_message(chat_id=target_chat, text="🔁 Looping queue...")
                             if not first_track.file_path:
                                 is_live = getattr(first_track, 'is_live', False)
-                                first_track.file_path = await yt.download(first_track.id, is_live=is_live)
+                                first_track.file_path = await yt.download(
+                                    first_track.id, is_live=is_live,
+                                    priority=Priority.NEXT, progressive=True,
+                                )
                             first_track.message_id = msg.id
                             await self.play_media(chat_id, msg, first_track, message_chat_id=message_chat_id)
                         except errors.ChannelPrivate:
@@ -590,6 +772,14 @@ class TgCall(PyTgCalls):
                             await db.rm_chat(chat_id)
                         return
                 
+                # Preload hit rate: was the next track already downloaded?
+                preload.record(media)
+
+                # Gapless path: the next track was prepared before this one ended
+                if prepared and prepared.media is media:
+                    if await self._switch(chat_id, media, prepared, target_chat):
+                        return
+
                 try:
                     if media and media.message_id:
                         await app.delete_messages(
@@ -644,7 +834,9 @@ class TgCall(PyTgCalls):
                 
                 if not media.file_path:
                     is_live = getattr(media, 'is_live', False)
-                    media.file_path = await yt.download(media.id, is_live=is_live)
+                    media.file_path = await yt.download(
+                        media.id, is_live=is_live, priority=Priority.NEXT, progressive=True
+                    )
                     if not media.file_path:
                         await self.stop(chat_id)
                         if msg:
@@ -667,7 +859,7 @@ class TgCall(PyTgCalls):
                 
                 # ✨ NEW: After playing next track, start preloading upcoming tracks
                 try:
-                    asyncio.create_task(preload.start_preload(chat_id, count=2))
+                    asyncio.create_task(preload.start_preload(chat_id))
                 except Exception as e:
                     logger.debug(f"Error starting preload after play_next for {chat_id}: {e}")
             except Exception as e:
@@ -700,15 +892,20 @@ class TgCall(PyTgCalls):
                         
                         # Mark this stream end as processed
                         self._stream_end_cache[chat_id] = current_time
+                        self.transitions.ended(chat_id)
                         
                         # Clean up old cache entries (older than 5 seconds)
                         self._stream_end_cache = {
                             cid: t for cid, t in self._stream_end_cache.items()
                             if current_time - t < 5.0
                         }
-                        
+
+                        if await self.resume_progressive(chat_id):
+                            return
                         await self.play_next(chat_id)
                 elif isinstance(update, types.ChatUpdate):
+                    # Membership or voice chat state changed; look the chat up again
+                    chat_cache.invalidate(update.chat_id)
                     if update.status in [
                         types.ChatUpdate.Status.KICKED,
                         types.ChatUpdate.Status.LEFT_GROUP,
@@ -0,0 +1,127 @@
+# ==============================================================================
+# chats.py - Chat Metadata Cache
+# ==============================================================================
+# play_media, play_next and seek_stream used to call app.get_chat on every
+# track change only to learn whether the chat is a channel, and play_media
+# called get_chat_member for the assistant on every play in a channel.
+#
+# Features:
+# - Chat type and channel-play routing (channel -> group) per chat ID
+# - Assistant membership status per (chat, assistant)
+# - Entries expire after a TTL
+# - Invalidated by voice chat updates, member join/leave service messages
+#   and channel play changes
+# - Concurrent lookups of the same chat share one request
+# ==============================================================================
+
+import time
+from typing import Dict, Optional, Tuple
+
+from pyrogram import enums
+
+from HasiiMusic import app, db
+from HasiiMusic.core.inflight import SingleFlight
+
+
+class ChatInfo:
+    """What playback needs to know about a chat."""
+
+    def __init__(self, chat_type: enums.ChatType, message_chat: Optional[int]):
+        self.type = chat_type
+        self.message_chat = message_chat  # Group that gets messages in channel play
+        self.fetched_at = time.time()
+
+
+class ChatCache:
+    """
+    TTL cache of chat metadata keyed by chat ID.
+
+    Usage:
+        info = await chat_cache.get(chat_id)
+        if info.type == enums.ChatType.CHANNEL: ...
+    """
+
+    def __init__(self, ttl: int = 600):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid
+        """
+        self.ttl = ttl
+        self._chats: Dict[int, ChatInfo] = {}
+        # {(chat_id, user_id): (status, fetched_at)}
+        self._members: Dict[Tuple[int, int], Tuple[enums.ChatMemberStatus, float]] = {}
+        self._inflight = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl
+
+    async def get(self, chat_id: int) -> ChatInfo:
+        """
+        Return the metadata of a chat, fetching it if unknown or expired.
+
+        Raises:
+            RPCError: If Telegram cannot resolve the chat (not cached)
+        """
+        info = self._chats.get(chat_id)
+        if info and self._fresh(info.fetched_at):
+            self.hits += 1
+            return info
+        self.misses += 1
+        return await self._inflight.run(f"chat:{chat_id}", lambda: self._fetch(chat_id))
+
+    async def _fetch(self, chat_id: int) -> ChatInfo:
+        chat = await app.get_chat(chat_id)
+        message_chat = None
+        if chat.type == enums.ChatType.CHANNEL:
+            # Channel play: find the group that initiated it
+            message_chat = await db.get_group_for_channel(chat_id)
+        info = self._chats[chat_id] = ChatInfo(chat.type, message_chat)
+        return info
+
+    async def member_status(self, chat_id: int, user_id: int) -> enums.ChatMemberStatus:
+        """
+        Return a user's membership status in a chat (cached).
+
+        Raises:
+            RPCError: If the user is not a participant (not cached)
+        """
+        key = (chat_id, user_id)
+        cached = self._members.get(key)
+        if cached and self._fresh(cached[1]):
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        member = await app.get_chat_member(chat_id, user_id)
+        self._members[key] = (member.status, time.time())
+        return member.status
+
+    def invalidate(self, chat_id: int) -> None:
+        """Forget everything cached about a chat."""
+        dropped = self._chats.pop(chat_id, None) is not None
+        for key in [key for key in self._members if key[0] == chat_id]:
+            del self._members[key]
+            dropped = True
+        if dropped:
+            self.invalidations += 1
+
+    def invalidate_channels(self) -> None:
+        """Forget the channel-play routing of every cached channel."""
+        for chat_id, info in list(self._chats.items()):
+            if info.type == enums.ChatType.CHANNEL:
+                self.invalidate(chat_id)
+
+    def stats(self) -> dict:
+        """Return cache counters for monitoring."""
+        return {
+            "chats": len(self._chats),
+            "members": len(self._members),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
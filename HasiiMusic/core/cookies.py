@@ -0,0 +1,193 @@
+# ==============================================================================
+# cookies.py - Cookie Pool with Health Scoring
+# ==============================================================================
+# YouTube cookies wear out: some start hitting "Sign in to confirm you're
+# not a bot" and keep failing downloads while random selection keeps
+# handing them out. This pool tracks how every cookie file performs.
+#
+# Features:
+# - Score per cookie from recent success rate, bot-check rate and latency
+# - Weighted random choice by score (healthy cookies carry the load)
+# - Quarantine with exponential backoff after bot checks or repeated failures
+# - Thread-safe reporting (yt-dlp runs in worker threads)
+# - Per-cookie stats for the /cookies command
+# ==============================================================================
+
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from HasiiMusic import logger
+
+
+class CookieStats:
+    """Health record of one cookie file."""
+
+    def __init__(self):
+        self.success = 1.0  # EWMA of successful uses (new cookies start trusted)
+        self.bot_rate = 0.0  # EWMA of bot checks
+        self.latency = 0.0  # EWMA of seconds until yt-dlp got going
+        self.uses = 0
+        self.failures = 0
+        self.bot_checks = 0
+        self.strikes = 0  # Consecutive bad results, drives the backoff
+        self.quarantined_until = 0.0
+
+    @property
+    def score(self) -> float:
+        """Selection weight: higher is healthier."""
+        return max(0.05, self.success * (1.0 - self.bot_rate) / (1.0 + self.latency / 10.0))
+
+
+class CookiePool:
+    """
+    Cookie files in a directory with health-weighted selection.
+
+    Usage:
+        path = pool.choose()
+        ...  # use it with yt-dlp
+        pool.report(path, ok=True, latency=1.2)
+    """
+
+    ALPHA = 0.3  # Weight of the newest result in the moving averages
+    QUARANTINE_BASE = 60  # Seconds for the first quarantine
+    QUARANTINE_MAX = 6 * 3600  # Longest quarantine
+    FAILURE_STRIKES = 3  # Plain failures in a row before quarantine
+
+    def __init__(self, directory: str = "HasiiMusic/cookies"):
+        """
+        Initialize the pool.
+
+        Args:
+            directory: Folder holding Netscape-format .txt cookie files
+        """
+        self.directory = directory
+        self._stats: Dict[str, CookieStats] = {}
+        self._lock = threading.Lock()
+        self.scanned = False
+
+    def path(self, name: str) -> str:
+        return f"{self.directory}/{name}"
+
+    def scan(self) -> None:
+        """Pick up .txt files in the directory (keeps existing stats)."""
+        try:
+            names = [f for f in os.listdir(self.directory) if f.endswith(".txt")]
+        except OSError:
+            names = []
+        with self._lock:
+            for name in names:
+                self._stats.setdefault(name, CookieStats())
+        self.scanned = True
+
+    @property
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._stats)
+
+    def add(self, name: str) -> None:
+        """Add a cookie file (by file name) to the rotation."""
+        with self._lock:
+            self._stats.setdefault(name, CookieStats())
+
+    def remove(self, cookie: str, delete: bool = False) -> None:
+        """
+        Take a cookie out of rotation.
+
+        Args:
+            cookie: File name or path of the cookie
+            delete: Also delete the file (e.g. it is corrupted)
+        """
+        name = os.path.basename(cookie)
+        with self._lock:
+            self._stats.pop(name, None)
+        if delete:
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                pass
+
+    def choose(self) -> Optional[str]:
+        """
+        Return the path of a cookie file, weighted by health score.
+
+        Quarantined cookies are skipped; if every cookie is quarantined the
+        one released soonest is used rather than none at all.
+        """
+        if not self.scanned:
+            self.scan()
+        now = time.time()
+        with self._lock:
+            if not self._stats:
+                return None
+            ready = {n: s for n, s in self._stats.items() if s.quarantined_until <= now}
+            if ready:
+                names = list(ready)
+                name = random.choices(names, weights=[ready[n].score for n in names])[0]
+            else:
+                name = min(self._stats, key=lambda n: self._stats[n].quarantined_until)
+        return self.path(name)
+
+    def report(
+        self,
+        cookie: Optional[str],
+        ok: bool,
+        latency: float = 0.0,
+        bot: bool = False,
+    ) -> None:
+        """
+        Record the outcome of a yt-dlp call made with a cookie.
+
+        Args:
+            cookie: Path returned by choose() (None is ignored)
+            ok: Whether the call succeeded
+            latency: Seconds the call took to get going
+            bot: Whether YouTube answered with a bot check
+        """
+        if not cookie:
+            return
+        name = os.path.basename(cookie)
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                return
+            stats.uses += 1
+            stats.success += self.ALPHA * (float(ok) - stats.success)
+            stats.bot_rate += self.ALPHA * (float(bot) - stats.bot_rate)
+            if latency:
+                stats.latency += self.ALPHA * (latency - stats.latency)
+
+            if ok:
+                stats.strikes = 0
+                return
+            stats.failures += 1
+            stats.strikes += 1
+            if bot:
+                stats.bot_checks += 1
+            if bot or stats.strikes >= self.FAILURE_STRIKES:
+                backoff = min(
+                    self.QUARANTINE_MAX,
+                    self.QUARANTINE_BASE * 2 ** (stats.strikes - 1),
+                )
+                stats.quarantined_until = time.time() + backoff
+                logger.warning(f"🍪 Cookie {name} quarantined for {backoff // 60:.0f}m")
+
+    def stats(self) -> Dict[str, dict]:
+        """Return per-cookie health for monitoring."""
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    "score": s.score,
+                    "success": s.success,
+                    "bot_rate": s.bot_rate,
+                    "latency": s.latency,
+                    "uses": s.uses,
+                    "failures": s.failures,
+                    "bot_checks": s.bot_checks,
+                    "quarantine": max(0.0, s.quarantined_until - now),
+                }
+                for name, s in self._stats.items()
+            }
@@ -2,7 +2,7 @@
 # dir.py - Directory Management
 # ==============================================================================
 # This file ensures that required directories exist for the bot to store:
-# - cache: Temporary cache files
+# - cache: Generated thumbnails (size-bounded, see THUMB_CACHE_LIMIT)
 # - downloads: Downloaded audio/video files from Telegram or YouTube
 # These directories are created automatically on startup if they don't exist.
 # ==============================================================================
@@ -17,7 +17,7 @@ def ensure_dirs():
     Create necessary directories if they don't exist.
 
     Creates:
-    - cache/: For temporary cache files
+    - cache/: For generated thumbnails
     - downloads/: For downloaded media files
     """
     # List of required directories
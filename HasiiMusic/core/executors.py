@@ -0,0 +1,251 @@
+# ==============================================================================
+# executors.py - Named Worker Pools for Blocking Work
+# ==============================================================================
+# Blocking work used to share asyncio's default executor, so a burst of
+# thumbnail renders could hold up downloads and the other way round.
+# Each kind of work now gets its own bounded thread pool.
+#
+# Pools:
+# - downloads: yt-dlp file downloads (sized like the download scheduler)
+# - extract: yt-dlp URL extraction for direct and live streams
+# - render: PIL thumbnail rendering (threads, or processes with
+#   RENDER_PROCESSES so PIL does not hold the bot's GIL)
+#
+# Every pool reports queue depth, running jobs and wait/run latency so
+# /perf can show which one is the bottleneck.
+#
+# Process pools are forked and warmed when they are created, which is the
+# first thing the bot does, before database clients and other threads
+# exist.
+# ==============================================================================
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from HasiiMusic import logger
+
+
+def _timed(fn: Callable, *args) -> Tuple[float, float, Any]:
+    """Run fn(*args) in a worker process and report when it started and how long it took."""
+    started = time.time()
+    result = fn(*args)
+    return started, time.time() - started, result
+
+
+def _ready() -> None:
+    """No-op job that makes a process pool start its workers."""
+
+
+class WorkerPool:
+    """A bounded thread (or process) pool with queue and latency metrics."""
+
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        processes: bool = False,
+        initializer: Optional[Callable] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            name: Pool name (used for thread names and stats)
+            workers: Maximum number of threads (or processes)
+            processes: Run jobs in forked worker processes instead of threads;
+                jobs and their arguments must then be picklable
+            initializer: Called once in every worker process when it starts
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self.processes = processes and "fork" in multiprocessing.get_all_start_methods()
+        self._initializer = initializer
+        if self.processes:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=initializer,
+            )
+            # Fork every worker now (a fork pool starts them all on the first job)
+            self._executor.submit(_ready)
+        else:
+            self._executor = self._threads()
+        self._lock = threading.Lock()
+
+        if processes and not self.processes:
+            logger.warning(f"{name} pool: worker processes need fork(); using threads")
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def _threads(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f"hasii-{self.name}"
+        )
+
+    def _fall_back(self) -> None:
+        """Replace a broken process pool with threads (forking again is unsafe now)."""
+        if not self.processes:
+            return
+        logger.warning(f"{self.name} pool: a worker process died; switching to threads")
+        self.processes = False
+        broken, self._executor = self._executor, self._threads()
+        broken.shutdown(wait=False, cancel_futures=True)
+        if self._initializer:
+            self._initializer()
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in the pool and await its result.
+
+        Args:
+            fn: Blocking callable
+            args: Positional arguments for fn
+        """
+        if self.processes:
+            return await self._run_process(fn, *args)
+        submitted = time.monotonic()
+
+        def _call():
+            started = time.monotonic()
+            waited = started - submitted
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+            try:
+                return fn(*args)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                took = time.monotonic() - started
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.run_total += took
+                    self.run_max = max(self.run_max, took)
+
+        with self._lock:
+            self.queued += 1
+        future = self._executor.submit(_call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Cancelled before a thread picked it up; _call never ran
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+            raise
+
+    async def _run_process(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) in a worker process; metrics are recorded when it returns."""
+        submitted = time.time()
+        with self._lock:
+            self.queued += 1
+        try:
+            started, took, result = await asyncio.wrap_future(
+                self._executor.submit(_timed, fn, *args)
+            )
+        except asyncio.CancelledError:
+            with self._lock:
+                self.queued -= 1
+            raise
+        except BrokenProcessPool:
+            with self._lock:
+                self.queued -= 1
+            self._fall_back()
+            return await self.run(fn, *args)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+                self.completed += 1
+                self.failed += 1
+            raise
+        waited = max(0.0, started - submitted)
+        with self._lock:
+            self.queued -= 1
+            self.completed += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.run_total += took
+            self.run_max = max(self.run_max, took)
+        return result
+
+    def stats(self) -> dict:
+        """Return queue depth and latency metrics."""
+        with self._lock:
+            done = self.completed or 1
+            queued, running = self.queued, self.running
+            if self.processes:
+                # Jobs in worker processes are only seen when they return
+                running = min(queued, self.workers)
+                queued -= running
+            return {
+                "workers": self.workers,
+                "processes": self.processes,
+                "queued": queued,
+                "running": running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait": self.wait_total / done,
+                "max_wait": self.wait_max,
+                "avg_run": self.run_total / done,
+                "max_run": self.run_max,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and drop jobs that have not started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Executors:
+    """The bot's named worker pools."""
+
+    def __init__(
+        self,
+        downloads: int,
+        extract: int,
+        render: int,
+        render_processes: bool = False,
+        render_init: Optional[Callable] = None,
+    ):
+        """
+        Create the pools.
+
+        Args:
+            downloads: Threads for yt-dlp downloads
+            extract: Threads for yt-dlp URL extraction
+            render: Threads (or processes) for thumbnail rendering
+            render_processes: Render in worker processes instead of threads
+            render_init: Called once in every render process (e.g. load fonts)
+        """
+        self.downloads = WorkerPool("downloads", downloads)
+        self.extract = WorkerPool("extract", extract)
+        self.render = WorkerPool("render", render, render_processes, render_init)
+
+    @property
+    def pools(self) -> Dict[str, WorkerPool]:
+        return {pool.name: pool for pool in (self.downloads, self.extract, self.render)}
+
+    def stats(self) -> Dict[str, dict]:
+        """Return metrics of every pool keyed by name."""
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self) -> None:
+        """Shut every pool down without waiting for running jobs."""
+        for pool in self.pools.values():
+            pool.shutdown()
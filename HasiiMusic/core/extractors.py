@@ -0,0 +1,202 @@
+# ==============================================================================
+# extractors.py - Reusable yt-dlp Instance Pool
+# ==============================================================================
+# Building a yt_dlp.YoutubeDL loads every extractor and parses the cookie
+# file, and that happened on every download and URL lookup. This pool keeps
+# warmed instances and leases them to worker threads instead.
+#
+# Features:
+# - One set of idle instances per (profile, cookie file)
+# - An instance is used by one thread at a time
+# - Recycled after MAX_USES leases, when a lease raises or when retired
+# - Per-lease parameter overrides, restored when the lease ends
+# - One progress hook per instance that forwards to the current lease's hook
+# - Last error message per lease, also for errors yt-dlp only reports
+#   (ignoreerrors), so callers can tell bot checks from other failures
+# - Instances of a dropped cookie file are closed without writing the
+#   cookie jar back, so a deleted file stays deleted
+# ==============================================================================
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yt_dlp
+
+from HasiiMusic import logger
+
+
+class _ErrorLog:
+    """yt-dlp logger that remembers the last error of one instance."""
+
+    def __init__(self, pool: "ExtractorPool"):
+        self._pool = pool
+        self.key = 0  # id() of the instance, set once it exists
+
+    def debug(self, msg: str) -> None:
+        pass
+
+    def info(self, msg: str) -> None:
+        pass
+
+    def warning(self, msg: str) -> None:
+        pass
+
+    def error(self, msg: str) -> None:
+        self._pool._errors[self.key] = msg
+        logger.warning(f"yt-dlp: {msg}")
+
+
+class ExtractorPool:
+    """
+    Pool of long-lived YoutubeDL instances.
+
+    Usage (from a worker thread):
+        with pool.lease("download", opts, cookie, hook) as ydl:
+            ydl.download([url])
+    """
+
+    MAX_USES = 50  # Leases before an instance is closed and rebuilt
+    MAX_IDLE = 5  # Idle instances kept per (profile, cookie file)
+
+    def __init__(self):
+        """Initialize an empty pool."""
+        self._idle: Dict[Tuple[str, Optional[str]], List[yt_dlp.YoutubeDL]] = {}
+        self._uses: Dict[int, int] = {}  # {id(instance): completed leases}
+        self._hooks: Dict[int, Optional[Callable]] = {}  # {id(instance): lease hook}
+        self._retired = set()  # id()s of instances to close on release
+        self._errors: Dict[int, str] = {}  # {id(instance): last error this lease}
+        self._cookies: Dict[int, Optional[str]] = {}  # {id(instance): cookie file}
+        self._dropped = set()  # id()s of leased instances whose cookie file was dropped
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+
+    def _create(self, opts: dict, cookie: Optional[str]) -> yt_dlp.YoutubeDL:
+        log = _ErrorLog(self)
+        ydl = yt_dlp.YoutubeDL({**opts, "cookiefile": cookie, "logger": log})
+        key = log.key = id(ydl)
+        # yt-dlp may report progress from fragment threads, so the hook is
+        # looked up per instance rather than per thread
+        ydl.add_progress_hook(lambda status, key=key: self._dispatch(key, status))
+        with self._lock:
+            self._uses[key] = 0
+            self._cookies[key] = cookie
+            self.created += 1
+        return ydl
+
+    def _dispatch(self, key: int, status: dict) -> None:
+        hook = self._hooks.get(key)
+        if hook:
+            hook(status)
+
+    @contextmanager
+    def lease(
+        self,
+        profile: str,
+        opts: dict,
+        cookie: Optional[str] = None,
+        hook: Optional[Callable[[dict], None]] = None,
+        params: Optional[dict] = None,
+    ):
+        """
+        Borrow an instance configured with opts and cookie.
+
+        Args:
+            profile: Name of the option set; instances are only shared
+                between leases of the same profile and cookie file
+            opts: yt-dlp options for new instances (without cookiefile)
+            cookie: Cookie file path or None
+            hook: Progress hook for this lease only
+            params: Option overrides for this lease only (e.g. chunk size)
+        """
+        key = (profile, cookie)
+        with self._lock:
+            idle = self._idle.get(key)
+            ydl = idle.pop() if idle else None
+            if ydl is not None:
+                self.reused += 1
+        if ydl is None:
+            ydl = self._create(opts, cookie)
+
+        self._hooks[id(ydl)] = hook
+        self._errors.pop(id(ydl), None)
+        saved = {name: ydl.params.get(name) for name in (params or {})}
+        ydl.params.update(params or {})
+        healthy = False
+        try:
+            yield ydl
+            healthy = True
+        finally:
+            ydl.params.update(saved)
+            self._hooks.pop(id(ydl), None)
+            self._release(key, ydl, healthy)
+
+    def last_error(self, ydl: yt_dlp.YoutubeDL) -> str:
+        """Return the last error yt-dlp reported during the current lease."""
+        return self._errors.get(id(ydl), "")
+
+    def retire(self, ydl: yt_dlp.YoutubeDL) -> None:
+        """Close an instance when its lease ends (e.g. after a reported error)."""
+        self._retired.add(id(ydl))
+
+    def _release(self, key: Tuple[str, Optional[str]], ydl: yt_dlp.YoutubeDL, healthy: bool) -> None:
+        with self._lock:
+            uses = self._uses.get(id(ydl), 0) + 1
+            idle = self._idle.setdefault(key, [])
+            dropped = id(ydl) in self._dropped
+            healthy = healthy and not dropped and id(ydl) not in self._retired
+            self._retired.discard(id(ydl))
+            self._dropped.discard(id(ydl))
+            if healthy and uses < self.MAX_USES and len(idle) < self.MAX_IDLE:
+                self._uses[id(ydl)] = uses
+                idle.append(ydl)
+                return
+            self._uses.pop(id(ydl), None)
+            self._errors.pop(id(ydl), None)
+            self._cookies.pop(id(ydl), None)
+            self.recycled += 1
+        self._close(ydl, save_cookies=not dropped)
+
+    @staticmethod
+    def _close(ydl: yt_dlp.YoutubeDL, save_cookies: bool = True) -> None:
+        if not save_cookies:
+            # close() writes the cookie jar back to its file
+            ydl.params["cookiefile"] = None
+        try:
+            ydl.close()
+        except Exception as e:
+            logger.debug(f"Error closing yt-dlp instance: {e}")
+
+    def drop_cookie(self, cookie: Optional[str]) -> None:
+        """
+        Stop using a cookie file (e.g. before it is deleted).
+
+        Idle instances are closed now, leased ones when their lease ends;
+        neither writes the cookie jar back to the file.
+        """
+        with self._lock:
+            dropped = []
+            for key in [k for k in self._idle if k[1] == cookie]:
+                dropped.extend(self._idle.pop(key))
+            for ydl in dropped:
+                self._uses.pop(id(ydl), None)
+                self._cookies.pop(id(ydl), None)
+            # Whatever is left of this cookie is leased right now
+            self._dropped.update(
+                key for key, used in self._cookies.items() if used == cookie)
+        for ydl in dropped:
+            self._close(ydl, save_cookies=False)
+
+    def stats(self) -> dict:
+        """Return pool counters for monitoring."""
+        with self._lock:
+            idle = sum(len(instances) for instances in self._idle.values())
+        return {
+            "idle": idle,
+            "created": self.created,
+            "reused": self.reused,
+            "recycled": self.recycled,
+        }
@@ -0,0 +1,206 @@
+# ==============================================================================
+# http.py - Shared HTTP Client
+# ==============================================================================
+# Thumbnails and cookie files used to open a new aiohttp session for every
+# request, paying a fresh TCP + TLS handshake to i.ytimg.com for each
+# now-playing card. All outbound fetches now share one session.
+#
+# Features:
+# - Keep-alive connection pool with a global and a per-host limit
+# - DNS cache so hosts are not resolved for every request
+# - Default timeout, retries with backoff on network errors and 5xx/429
+# - Bodies can be streamed into a caller's buffer chunk by chunk
+# - Counters for requests, retries, new vs reused connections and latency
+# ==============================================================================
+
+import asyncio
+import time
+from io import BytesIO
+from typing import BinaryIO, Optional, Tuple
+
+import aiohttp
+
+from HasiiMusic import logger
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HTTPClient:
+    """
+    One aiohttp session for the whole bot.
+
+    Usage:
+        status, body = await http.fetch(url)
+        status = await http.fetch_to(url, buffer)
+    """
+
+    KEEPALIVE = 30  # Seconds an idle connection stays open
+    BACKOFF = 0.5  # Seconds before the first retry, doubled per attempt
+    CHUNK = 64 * 1024  # Bytes read per step when streaming a body
+
+    def __init__(
+        self,
+        limit: int = 100,
+        per_host: int = 20,
+        timeout: int = 15,
+        retries: int = 2,
+        dns_ttl: int = 300,
+    ):
+        """
+        Initialize the client (the session is created on first use).
+
+        Args:
+            limit: Open connections across all hosts
+            per_host: Open connections to one host
+            timeout: Default total timeout of a request in seconds
+            retries: Extra attempts after a failed request
+            dns_ttl: Seconds a resolved host is cached
+        """
+        self.limit = limit
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.dns_ttl = dns_ttl
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.requests = 0
+        self.failures = 0
+        self.retried = 0
+        self.bytes = 0
+        self.latency_total = 0.0
+        self.connections = 0  # New connections opened
+        self.reused = 0  # Requests served on a kept-alive connection
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def _trace(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def _created(*_):
+            self.connections += 1
+
+        async def _reused(*_):
+            self.reused += 1
+
+        async def _dns_hit(*_):
+            self.dns_hits += 1
+
+        async def _dns_miss(*_):
+            self.dns_misses += 1
+
+        trace.on_connection_create_end.append(_created)
+        trace.on_connection_reuseconn.append(_reused)
+        trace.on_dns_cache_hit.append(_dns_hit)
+        trace.on_dns_cache_miss.append(_dns_miss)
+        return trace
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, created inside the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.KEEPALIVE,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[self._trace()],
+            )
+        return self._session
+
+    async def fetch(
+        self,
+        url: str,
+        timeout: Optional[int] = None,
+        retries: Optional[int] = None,
+    ) -> Tuple[int, bytes]:
+        """
+        GET a URL and return its status and body.
+
+        Network errors, timeouts and 5xx/429 answers are retried with
+        backoff; the last answer (or error) is returned (or raised).
+
+        Args:
+            url: URL to fetch
+            timeout: Total timeout in seconds (default: client timeout)
+            retries: Extra attempts (default: client retries)
+        """
+        buffer = BytesIO()
+        status = await self.fetch_to(url, buffer, timeout, retries)
+        return status, buffer.getvalue()
+
+    async def fetch_to(
+        self,
+        url: str,
+        sink: BinaryIO,
+        timeout: Optional[int] = None,
+        retries: Optional[int] = None,
+    ) -> int:
+        """
+        GET a URL and stream its body into a buffer as it arrives.
+
+        Retries like fetch(); the buffer is emptied before every attempt,
+        so it holds exactly the body of the returned answer.
+
+        Args:
+            url: URL to fetch
+            sink: Seekable binary buffer (e.g. BytesIO) to write the body to
+            timeout: Total timeout in seconds (default: client timeout)
+            retries: Extra attempts (default: client retries)
+
+        Returns:
+            int: HTTP status of the last answer
+        """
+        attempts = 1 + (self.retries if retries is None else retries)
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        for attempt in range(attempts):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self.BACKOFF * 2 ** (attempt - 1))
+            sink.seek(0)
+            sink.truncate()
+            started = time.monotonic()
+            self.requests += 1
+            try:
+                async with self.session.get(url, timeout=request_timeout) as resp:
+                    status = resp.status
+                    async for chunk in resp.content.iter_chunked(self.CHUNK):
+                        sink.write(chunk)
+                        self.bytes += len(chunk)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.failures += 1
+                if attempt + 1 == attempts:
+                    raise
+                logger.debug(f"HTTP GET {url} failed ({e}), retrying")
+                continue
+            finally:
+                self.latency_total += time.monotonic() - started
+
+            if status in RETRY_STATUSES and attempt + 1 < attempts:
+                self.failures += 1
+                continue
+            sink.seek(0)
+            return status
+
+    async def close(self) -> None:
+        """Close the session and its connections."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> dict:
+        """Return request and connection counters for monitoring."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retried": self.retried,
+            "bytes": self.bytes,
+            "avg_latency": self.latency_total / (self.requests or 1),
+            "connections": self.connections,
+            "reused": self.reused,
+            "dns_hits": self.dns_hits,
+            "dns_misses": self.dns_misses,
+        }
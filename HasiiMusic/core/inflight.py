@@ -0,0 +1,90 @@
+# ==============================================================================
+# inflight.py - Single-Flight Request Coalescing
+# ==============================================================================
+# When several chats ask for the same video at the same moment, only one
+# download should run. This module keeps a registry of in-flight work keyed
+# by video ID so that every concurrent caller awaits the same future.
+#
+# Features:
+# - One shared task per key, later callers simply join it
+# - Waiter counts per key (for monitoring)
+# - A cancelled caller only cancels the shared task if it was the last waiter
+# ==============================================================================
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Registry of in-flight coroutines keyed by an ID."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._flights: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.started = 0  # Number of tasks actually started
+        self.coalesced = 0  # Number of callers that joined an existing task
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() once per key and share the result with all callers.
+
+        Args:
+            key: Identifier of the work (e.g. video ID)
+            factory: Zero-argument callable returning the coroutine to run
+
+        Returns:
+            The result of the shared coroutine.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._flights[key] = task
+            self._waiters[key] = 0
+            self.started += 1
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # Shield so one cancelled caller (e.g. a preload) does not kill
+            # the download other chats are waiting for
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key, 0) <= 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            if key in self._waiters:
+                self._waiters[key] -= 1
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        """Drop a finished task from the registry."""
+        if self._flights.get(key) is task:
+            self._flights.pop(key, None)
+            self._waiters.pop(key, None)
+        # Mark the exception as retrieved; every waiter already received it
+        if not task.cancelled():
+            task.exception()
+
+    def waiters(self, key: str) -> int:
+        """Return how many callers are awaiting the task for a key."""
+        return self._waiters.get(key, 0)
+
+    def in_flight(self, key: str) -> bool:
+        """Check whether work for a key is currently running."""
+        return key in self._flights
+
+    def active(self) -> Dict[str, int]:
+        """Return {key: waiter count} for every in-flight task."""
+        return dict(self._waiters)
+
+    def stats(self) -> dict:
+        """Return coalescing counters for monitoring."""
+        return {
+            "in_flight": len(self._flights),
+            "waiters": sum(self._waiters.values()),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
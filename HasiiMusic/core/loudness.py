@@ -0,0 +1,140 @@
+# ==============================================================================
+# loudness.py - Loudness Normalization
+# ==============================================================================
+# YouTube uploads differ a lot in volume. Each downloaded video is measured
+# once (EBU R128 integrated loudness via ffmpeg's loudnorm filter) and the
+# gain that brings it to the target loudness is stored in MongoDB, so every
+# chat that plays it later gets the same level without any analysis.
+#
+# Features:
+# - Background analysis after download, one ffmpeg run per video ID
+# - Gain kept in memory and in MongoDB (survives restarts)
+# - Boost limited by true-peak headroom so quiet tracks do not clip
+# - Applied as an ffmpeg volume filter when the track starts
+# ==============================================================================
+
+import asyncio
+import json
+import re
+import shutil
+from typing import Dict, Optional
+
+from HasiiMusic import logger
+
+
+class LoudnessAnalyzer:
+    """
+    Measures tracks once and hands out their normalization gain.
+
+    Usage:
+        analyzer.submit(video_id, "downloads/abc.webm")
+        gain = await analyzer.gain(video_id)  # dB, or None if not measured
+    """
+
+    MAX_BOOST = 10.0  # dB
+    MAX_CUT = 15.0  # dB
+    PEAK_CEILING = -1.0  # dBTP the boosted track may reach
+    MAX_MEMORY = 10000  # Gains kept in memory
+
+    def __init__(self, db, enabled: bool = False, target: float = -14.0):
+        """
+        Initialize the analyzer.
+
+        Args:
+            db: MongoDB manager (get_loudness / set_loudness)
+            enabled: Whether tracks are analyzed and gains applied
+            target: Integrated loudness to normalize to, in LUFS
+        """
+        self.db = db
+        self.enabled = enabled and shutil.which("ffmpeg") is not None
+        self.target = target
+        self._gains: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._slot = asyncio.Semaphore(1)
+
+        self.analyzed = 0
+        self.failed = 0
+        self.applied = 0
+
+        if enabled and not self.enabled:
+            logger.warning("LOUDNESS_NORMALIZE is on but ffmpeg was not found; disabled")
+
+    def _remember(self, video_id: str, gain: float) -> None:
+        self._gains[video_id] = gain
+        while len(self._gains) > self.MAX_MEMORY:
+            self._gains.pop(next(iter(self._gains)))
+
+    async def gain(self, video_id: str) -> Optional[float]:
+        """Return the stored gain of a video in dB, or None if unknown."""
+        if not self.enabled:
+            return None
+        gain = self._gains.get(video_id)
+        if gain is None:
+            doc = await self.db.get_loudness(video_id)
+            if not doc:
+                return None
+            gain = doc["gain"]
+            self._remember(video_id, gain)
+        self.applied += 1
+        return gain
+
+    def submit(self, video_id: str, path: str) -> None:
+        """Measure a downloaded file in the background (once per video)."""
+        if not self.enabled or video_id in self._gains or video_id in self._tasks:
+            return
+        task = asyncio.create_task(self._analyze(video_id, path))
+        self._tasks[video_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(video_id, None))
+
+    def _gain_for(self, lufs: float, peak: float) -> float:
+        gain = self.target - lufs
+        # Never boost the true peak above the ceiling
+        gain = min(gain, self.PEAK_CEILING - peak)
+        return round(max(-self.MAX_CUT, min(self.MAX_BOOST, gain)), 1)
+
+    async def _analyze(self, video_id: str, path: str) -> None:
+        # Another chat or an earlier run may have measured it already
+        doc = await self.db.get_loudness(video_id)
+        if doc:
+            self._remember(video_id, doc["gain"])
+            return
+
+        async with self._slot:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    "ffmpeg", "-nostdin", "-hide_banner", "-i", path, "-vn",
+                    "-af", "loudnorm=print_format=json", "-f", "null", "-",
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, err = await proc.communicate()
+                # loudnorm prints its measurement as the last JSON object
+                found = re.findall(r"\{[^{}]*\}", err.decode(errors="ignore"))
+                if proc.returncode != 0 or not found:
+                    raise RuntimeError(f"ffmpeg exited with {proc.returncode}")
+                data = json.loads(found[-1])
+                lufs = float(data["input_i"])
+                peak = float(data["input_tp"])
+            except Exception as e:
+                self.failed += 1
+                logger.debug(f"Loudness analysis of {video_id} failed: {e}")
+                return
+
+        # Silence measures as -inf / -70 LUFS; leave such tracks alone
+        gain = self._gain_for(lufs, peak) if lufs > -70 else 0.0
+        self._remember(video_id, gain)
+        self.analyzed += 1
+        await self.db.set_loudness(video_id, {"lufs": lufs, "peak": peak, "gain": gain})
+        logger.debug(f"Loudness of {video_id}: {lufs:.1f} LUFS, gain {gain:+.1f} dB")
+
+    def stats(self) -> dict:
+        """Return analysis counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "target": self.target,
+            "known": len(self._gains),
+            "running": len(self._tasks),
+            "analyzed": self.analyzed,
+            "failed": self.failed,
+            "applied": self.applied,
+        }
@@ -8,6 +8,9 @@
 # - blacklist: Blacklisted users/chats
 # - calls: Active voice call sessions
 # - cache: Admin list cache
+# - search: Cached YouTube search results (expire via TTL index)
+# - loudness: Measured loudness and normalization gain per video
+# - photos: Telegram file_ids of uploaded now-playing thumbnails
 #
 # Features:
 # - Async MongoDB operations for better performance
@@ -16,6 +19,7 @@
 # - Random assistant selection for load balancing
 # ==============================================================================
 
+from datetime import datetime, timedelta, timezone
 from random import randint
 from time import time
 import asyncio
@@ -68,6 +72,7 @@ class MongoDB:
         self.logger = False
         self.maintenance = False  # Maintenance mode status
         self.gbanned_users = []  # Globally banned users
+        self.on_cmode_change = None  # Called after set_cmode (e.g. to drop cached routing)
 
         self.assistant = {}
         self.assistantdb = self.db.assistant
@@ -84,6 +89,12 @@ class MongoDB:
         self.play_mode = []
         self.playmodedb = self.db.play
 
+        self.searchdb = self.db.search
+
+        self.loudnessdb = self.db.loudness
+
+        self.photosdb = self.db.photos
+
         self.users = []
         self.usersdb = self.db.users
 
@@ -107,6 +118,8 @@ class MongoDB:
                 await self.authdb.create_index("_id")
                 await self.langdb.create_index("_id")
                 await self.cache.create_index("_id")
+                # Each search document expires at its own "expires" time
+                await self.searchdb.create_index("expires", expireAfterSeconds=0)
 
                 await self.load_cache()
                 return  # Success, exit the function
@@ -377,6 +390,8 @@ class MongoDB:
                 {"$set": {"channel_id": channel_id}},
                 upsert=True,
             )
+        if self.on_cmode_change:
+            self.on_cmode_change()
     
     async def get_group_for_channel(self, channel_id: int) -> int | None:
         """Reverse lookup: Find which group has this channel set for channel play.
@@ -455,6 +470,52 @@ class MongoDB:
         doc = await self.cache.find_one({"_id": "sudoers"})
         return doc.get("user_ids", []) if doc else []
 
+    # SEARCH CACHE METHODS
+    async def get_search(self, key: str) -> dict | None:
+        """Get a cached search result (track fields) if it has not expired."""
+        doc = await self.searchdb.find_one({"_id": key})
+        if not doc:
+            return None
+        # The TTL monitor only runs once a minute, so check expiry ourselves
+        expires = doc["expires"].replace(tzinfo=timezone.utc)
+        if expires <= datetime.now(timezone.utc):
+            return None
+        return doc["track"]
+
+    async def set_search(self, key: str, track: dict, ttl: int) -> None:
+        """Store a search result for ttl seconds."""
+        await self.searchdb.update_one(
+            {"_id": key},
+            {"$set": {
+                "track": track,
+                "expires": datetime.now(timezone.utc) + timedelta(seconds=ttl),
+            }},
+            upsert=True,
+        )
+
+    # LOUDNESS METHODS
+    async def get_loudness(self, video_id: str) -> dict | None:
+        """Get the measured loudness (lufs, peak, gain) of a video."""
+        return await self.loudnessdb.find_one({"_id": video_id})
+
+    async def set_loudness(self, video_id: str, data: dict) -> None:
+        """Store the measured loudness of a video."""
+        await self.loudnessdb.update_one({"_id": video_id}, {"$set": data}, upsert=True)
+
+    # PHOTO FILE_ID METHODS
+    async def get_photo(self, key: str) -> str | None:
+        """Get the Telegram file_id of an uploaded photo."""
+        doc = await self.photosdb.find_one({"_id": key})
+        return doc["file_id"] if doc else None
+
+    async def set_photo(self, key: str, file_id: str) -> None:
+        """Store the Telegram file_id of an uploaded photo."""
+        await self.photosdb.update_one({"_id": key}, {"$set": {"file_id": file_id}}, upsert=True)
+
+    async def delete_photo(self, key: str) -> None:
+        """Forget a file_id Telegram no longer accepts."""
+        await self.photosdb.delete_one({"_id": key})
+
     # USER METHODS
     async def is_user(self, user_id: int) -> bool:
         return user_id in self.users
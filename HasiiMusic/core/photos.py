@@ -0,0 +1,134 @@
+# ==============================================================================
+# photos.py - Telegram file_id Reuse for Now-Playing Cards
+# ==============================================================================
+# Every now-playing card used to upload its thumbnail again, even when the
+# same track had already been announced in dozens of groups that day.
+#
+# Features:
+# - Remembers the file_id Telegram returns for the first upload of a photo
+# - Later sends reference the file_id instead of uploading the bytes
+# - Kept in memory and in MongoDB (survives restarts)
+# - Local files are keyed by name and modification time, so a re-rendered
+#   thumbnail is uploaded again instead of showing the old picture
+# - A file_id Telegram rejects as stale or invalid (e.g. after a bot token
+#   change) is forgotten and the file uploaded again; other errors are not
+#   the file_id's fault and leave it alone
+# ==============================================================================
+
+import os
+from typing import Dict, Optional
+
+from pyrogram.types import Message
+
+from HasiiMusic import logger
+
+# Telegram errors that mean the file_id itself can no longer be used
+STALE_ERRORS = {
+    "FILE_REFERENCE_EXPIRED",
+    "FILE_REFERENCE_INVALID",
+    "FILE_ID_INVALID",
+    "MEDIA_EMPTY",
+    "PHOTO_INVALID_DIMENSIONS",
+}
+
+
+class PhotoIds:
+    """
+    Maps photos (local paths or URLs) to the file_id of their first upload.
+
+    Usage:
+        file_id = await photo_ids.get(path)
+        sent = await app.send_photo(chat_id, file_id or path)
+        await photo_ids.remember(path, sent)
+    """
+
+    MAX_MEMORY = 5000  # file_ids kept in memory
+
+    def __init__(self, db):
+        """
+        Initialize the map.
+
+        Args:
+            db: MongoDB manager (get_photo / set_photo / delete_photo)
+        """
+        self.db = db
+        self._ids: Dict[str, str] = {}
+
+        self.reused = 0
+        self.uploaded = 0
+        self.stale = 0
+
+    @staticmethod
+    def key(photo: str) -> Optional[str]:
+        """Return the lookup key of a photo, or None if it cannot be keyed."""
+        if not isinstance(photo, str):
+            return None
+        if photo.startswith(("http://", "https://")):
+            return photo
+        try:
+            mtime = int(os.stat(photo).st_mtime)
+        except OSError:
+            return None
+        return f"{os.path.basename(photo)}:{mtime}"
+
+    @staticmethod
+    def is_stale(error: Exception) -> bool:
+        """Check whether Telegram rejected a send because of its file_id."""
+        error_id = getattr(error, "ID", None) or ""
+        return error_id in STALE_ERRORS or error_id.startswith("FILE_REFERENCE_")
+
+    def _remember(self, key: str, file_id: str) -> None:
+        self._ids[key] = file_id
+        while len(self._ids) > self.MAX_MEMORY:
+            self._ids.pop(next(iter(self._ids)))
+
+    async def get(self, photo: str) -> Optional[str]:
+        """Return the file_id of an earlier upload of a photo, or None."""
+        key = self.key(photo)
+        if not key:
+            return None
+        file_id = self._ids.get(key)
+        if file_id is None:
+            try:
+                file_id = await self.db.get_photo(key)
+            except Exception as e:
+                logger.debug(f"Could not read file_id of {key}: {e}")
+                return None
+            if not file_id:
+                return None
+            self._remember(key, file_id)
+        self.reused += 1
+        return file_id
+
+    async def remember(self, photo: str, sent: Optional[Message]) -> None:
+        """Store the file_id of a message that uploaded a photo."""
+        key = self.key(photo)
+        if not key or not sent or not sent.photo:
+            return
+        self.uploaded += 1
+        self._remember(key, sent.photo.file_id)
+        try:
+            await self.db.set_photo(key, sent.photo.file_id)
+        except Exception as e:
+            logger.debug(f"Could not store file_id of {key}: {e}")
+
+    async def forget(self, photo: str) -> None:
+        """Drop a file_id Telegram no longer accepts."""
+        key = self.key(photo)
+        if not key:
+            return
+        self.stale += 1
+        self._ids.pop(key, None)
+        try:
+            await self.db.delete_photo(key)
+        except Exception as e:
+            logger.debug(f"Could not delete file_id of {key}: {e}")
+
+    def stats(self) -> dict:
+        """Return reuse counters for monitoring."""
+        return {
+            "known": len(self._ids),
+            "reused": self.reused,
+            "uploaded": self.uploaded,
+            "stale": self.stale,
+        }
@@ -0,0 +1,219 @@
+# ==============================================================================
+# playlists.py - Lazy Playlist Engine
+# ==============================================================================
+# Large playlists used to be fetched in full and queued all at once, which
+# made /play slow and forced a low PLAYLIST_LIMIT.
+#
+# Features:
+# - Playlist pages cached by list ID with a TTL (re-requests are free)
+# - Pages are only fetched when the queue needs more tracks
+# - /play answers with the first batch, the rest is queued in batches as
+#   the queue runs low
+# - Queued entries are lightweight placeholders built from the page data;
+#   missing metadata is filled in shortly before they play
+# ==============================================================================
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from py_yt import Playlist
+
+from HasiiMusic import logger, queue
+from HasiiMusic.helpers import Track, utils
+
+
+class _Listing:
+    """Videos of one playlist fetched so far."""
+
+    def __init__(self, url: str):
+        self.playlist = Playlist(url)
+        self.fetched_at = time.time()
+        self.started = False
+        self.lock = asyncio.Lock()
+
+    @property
+    def videos(self) -> list:
+        return self.playlist.videos if self.started else []
+
+    @property
+    def complete(self) -> bool:
+        return self.started and not self.playlist.hasMoreVideos
+
+
+class _Pending:
+    """Part of a playlist that still has to be queued for a chat."""
+
+    def __init__(self, url: str, offset: int, limit: int, user: str):
+        self.url = url
+        self.offset = offset  # Index of the next video to queue
+        self.limit = limit  # Index at which to stop (PLAYLIST_LIMIT)
+        self.user = user
+
+
+class PlaylistEngine:
+    """
+    Fetches playlists page by page and feeds them into chat queues.
+
+    Usage:
+        tracks = await engine.start(chat_id, url, limit, user)
+        ...  # queue tracks, later:
+        await engine.top_up(chat_id)
+    """
+
+    BATCH = 25  # Tracks queued at a time
+    LOW_WATER = 10  # Queue the next batch when fewer tracks are waiting
+    MAX_LISTINGS = 50  # Playlists kept in the page cache
+
+    def __init__(self, ttl: int = 1800):
+        """
+        Initialize the engine.
+
+        Args:
+            ttl: Seconds a fetched playlist page stays valid
+        """
+        self.ttl = ttl
+        self._listings: OrderedDict = OrderedDict()  # {list_id: _Listing}
+        self._pending: Dict[int, _Pending] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.pages = 0
+
+    @staticmethod
+    def list_id(url: str) -> str:
+        """Return the list= ID of a playlist URL (the URL itself if absent)."""
+        return parse_qs(urlparse(url).query).get("list", [url])[0]
+
+    def _listing(self, url: str) -> _Listing:
+        key = self.list_id(url)
+        listing = self._listings.get(key)
+        if listing and time.time() - listing.fetched_at < self.ttl:
+            self._listings.move_to_end(key)
+            self.hits += 1
+            return listing
+        self.misses += 1
+        listing = self._listings[key] = _Listing(url)
+        while len(self._listings) > self.MAX_LISTINGS:
+            self._listings.popitem(last=False)
+        return listing
+
+    async def _videos(self, url: str, count: int) -> list:
+        """Return at least count videos if the playlist has that many."""
+        listing = self._listing(url)
+        async with listing.lock:
+            while len(listing.videos) < count and not listing.complete:
+                before = len(listing.videos)
+                await listing.playlist.getNextVideos()
+                listing.started = True
+                self.pages += 1
+                if len(listing.videos) == before:
+                    break  # No progress; treat as the end of the list
+        return listing.videos
+
+    @staticmethod
+    def _track(data: dict, user: str) -> Optional[Track]:
+        """Build a placeholder Track from a playlist page entry."""
+        video_id = data.get("id")
+        if not video_id:
+            return None
+        thumbnails = data.get("thumbnails") or []
+        thumbnail = thumbnails[-1].get("url", "").split("?")[0] if thumbnails else ""
+        link = (data.get("link") or "").split("&list=")[0]
+        duration = data.get("duration") or "0:00"
+        return Track(
+            id=video_id,
+            channel_name=(data.get("channel") or {}).get("name", ""),
+            duration=duration,
+            duration_sec=utils.to_seconds(duration),
+            title=(data.get("title") or "Unknown")[:25],
+            thumbnail=thumbnail,
+            url=link,
+            user=user,
+            placeholder=True,  # No view count on playlist pages; completed before playback
+        )
+
+    async def tracks(self, url: str, start: int, count: int, user: str) -> List[Track]:
+        """
+        Return placeholder tracks for videos [start, start + count).
+
+        Args:
+            url: Playlist URL
+            start: Index of the first video
+            count: Number of videos
+            user: Mention of the user who requested the playlist
+        """
+        videos = await self._videos(url, start + count)
+        tracks = []
+        for data in videos[start:start + count]:
+            track = self._track(data, user)
+            if track:
+                tracks.append(track)
+        return tracks
+
+    async def start(self, chat_id: int, url: str, limit: int, user: str) -> List[Track]:
+        """
+        Return the first batch of a playlist and remember the rest for top_up().
+
+        Args:
+            chat_id: Chat the playlist is played in
+            url: Playlist URL
+            limit: Maximum number of videos to queue in total
+            user: Mention of the requesting user
+        """
+        first = min(self.BATCH, limit)
+        tracks = await self.tracks(url, 0, first, user)
+        if tracks and first < limit:
+            self._pending[chat_id] = _Pending(url, first, limit, user)
+        else:
+            self._pending.pop(chat_id, None)
+        return tracks
+
+    def pending(self, chat_id: int) -> bool:
+        """Check whether a chat still has playlist tracks to queue."""
+        return chat_id in self._pending
+
+    def cancel(self, chat_id: int) -> None:
+        """Forget the rest of a chat's playlist (e.g. on /stop)."""
+        self._pending.pop(chat_id, None)
+
+    async def top_up(self, chat_id: int) -> int:
+        """
+        Queue the next batch if the chat's queue is running low.
+
+        Returns:
+            int: Number of tracks added
+        """
+        lock = self._locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            pending = self._pending.get(chat_id)
+            if not pending or len(queue.get_queue(chat_id)) > self.LOW_WATER:
+                return 0
+            count = min(self.BATCH, pending.limit - pending.offset)
+            try:
+                tracks = await self.tracks(pending.url, pending.offset, count, pending.user)
+            except Exception as e:
+                logger.warning(f"Could not load more of playlist for {chat_id}: {e}")
+                tracks = []
+            if self._pending.get(chat_id) is not pending:
+                return 0  # Stopped or replaced while the page was loading
+
+            for track in tracks:
+                queue.add(chat_id, track)
+            pending.offset += count
+            if not tracks or pending.offset >= pending.limit:
+                self._pending.pop(chat_id, None)
+            return len(tracks)
+
+    def stats(self) -> dict:
+        """Return cache counters for monitoring."""
+        return {
+            "listings": len(self._listings),
+            "pending": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+            "pages": self.pages,
+        }
@@ -5,157 +5,266 @@
 # to eliminate gaps between songs during playback.
 #
 # Features:
-# - Downloads next 2-3 tracks in background while current track plays
-# - Respects existing download semaphore limits (max 5 concurrent)
-# - Automatically cancels preload tasks when queue changes
-# - Prevents duplicate downloads
-# - Smart prioritization (next track = highest priority)
+# - Lookahead sized per chat: upcoming tracks are downloaded until about
+#   PRELOAD_AHEAD seconds of audio are covered, plus the time the measured
+#   download speed needs to fetch the next one (at most PRELOAD_DEPTH)
+# - At most PRELOAD_BUDGET preloads run at once across all chats, so /play
+#   and play_next always find a free download slot
+# - Past PRELOAD_MAX_JOBS pending preloads, chats only get their next track
+# - A video queued in several chats is preloaded once for all of them
+# - Preloads that left the lookahead window (skip, shuffle, remove) are
+#   cancelled, all of a chat's preloads on stop
+# - Hit rate: how often play_next found the next track already downloaded
 # ==============================================================================
 
 import asyncio
-from pathlib import Path
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set
 
 from HasiiMusic import logger
+from HasiiMusic.core.scheduler import Priority
+
+
+class _Job:
+    """One preload download, shared by every chat that queued the video."""
+
+    def __init__(self, video_id: str):
+        self.video_id = video_id
+        self.task: Optional[asyncio.Task] = None
+        self.tracks: List = []  # Queue items to update when the file is ready
+        self.chats: Set[int] = set()
+        self.cancelled = False  # Download withdrawn through the scheduler
 
 
 class PreloadManager:
     """
     Manages background preloading of upcoming tracks in queue.
-    
+
     This class ensures seamless transitions between songs by downloading
     upcoming tracks while the current track is still playing.
     """
-    
-    def __init__(self):
-        """Initialize the preload manager."""
-        # Track active preload tasks per chat: {chat_id: set of asyncio.Task}
-        self._preload_tasks: Dict[int, Set[asyncio.Task]] = {}
-        
-        # Track which items are currently being preloaded to prevent duplicates
-        self._preloading: Dict[int, Set[str]] = {}  # {chat_id: set of track IDs}
-    
-    async def start_preload(self, chat_id: int, count: int = 2) -> None:
+
+    AUDIO_RATE = 20 * 1024  # Bytes per second of a typical bestaudio stream
+    DEFAULT_SPEED = 1024 * 1024  # Assumed download speed before any measurement
+    DEFAULT_DURATION = 240  # Seconds assumed for tracks of unknown length
+
+    def __init__(
+        self, depth: int = 5, budget: int = 3, ahead: int = 600, max_jobs: int = 10
+    ):
         """
-        Start preloading upcoming tracks for a chat.
-        
+        Initialize the preload manager.
+
         Args:
-            chat_id: The chat ID to preload tracks for
-            count: Number of upcoming tracks to preload (default: 2)
+            depth: Most upcoming tracks to keep downloaded per chat
+            budget: Preload downloads allowed to run at once (all chats)
+            ahead: Seconds of upcoming audio to keep downloaded per chat
+            max_jobs: Pending preloads (all chats) beyond which chats only
+                preload their next track
         """
-        from HasiiMusic import queue, yt
-        
-        # Get upcoming tracks from queue
-        upcoming_tracks = queue.peek_next(chat_id, count)
-        
-        if not upcoming_tracks:
-            return
-        
-        # Initialize tracking sets if needed
-        if chat_id not in self._preload_tasks:
-            self._preload_tasks[chat_id] = set()
-        if chat_id not in self._preloading:
-            self._preloading[chat_id] = set()
-        
-        # Start preload task for each track that needs downloading
-        for track in upcoming_tracks:
-            # Skip if already downloaded or currently being preloaded
-            if queue.is_downloaded(track):
-                continue
-            
-            track_id = getattr(track, 'id', None)
-            if not track_id or track_id in self._preloading[chat_id]:
-                continue
-            
-            # Mark as being preloaded
-            self._preloading[chat_id].add(track_id)
-            
-            # Create background task for this track
-            task = asyncio.create_task(
-                self._preload_track(chat_id, track)
-            )
-            self._preload_tasks[chat_id].add(task)
-            
-            # Add callback to clean up task when done
-            task.add_done_callback(
-                lambda t, cid=chat_id: self._cleanup_task(cid, t)
-            )
-    
-    async def _preload_track(self, chat_id: int, track) -> None:
+        self.depth = max(1, depth)
+        self.ahead = ahead
+        self.max_jobs = max(1, max_jobs)
+        self._slots = asyncio.Semaphore(max(1, budget))
+        self.budget = max(1, budget)
+        self._jobs: Dict[str, _Job] = {}  # {video_id: job}
+        self._chats: Dict[int, Set[str]] = {}  # {chat_id: video IDs it waits for}
+
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.preempted = 0  # Gave their slot to /play or play_next
+        self.deduped = 0
+        self.hits = 0
+        self.misses = 0
+        self.capped = 0
+        self._windows: Dict[int, int] = {}  # {chat_id: last lookahead size}
+
+    def _download_time(self, duration: int) -> float:
+        """Estimate the seconds needed to download a track of this length."""
+        from HasiiMusic import yt
+
+        speed = yt.tuner.stats()["speed"] or self.DEFAULT_SPEED
+        return duration * self.AUDIO_RATE / speed
+
+    def window(self, chat_id: int) -> list:
+        """
+        Pick the upcoming tracks of a chat that should be downloaded now.
+
+        A track is in the window while the audio playing before it (rest of
+        the current track plus the tracks ahead of it) is shorter than the
+        target plus the time its own download is expected to take.
+
+        Args:
+            chat_id: The chat ID to size the lookahead for
+
+        Returns:
+            Upcoming queue items, next track first
+        """
+        from HasiiMusic import queue
+
+        upcoming = queue.peek_next(chat_id, self.depth)
+        current = queue.get_current(chat_id)
+        if current and current.duration_sec:
+            before = max(0, current.duration_sec - (current.time or 0))
+        else:
+            before = 0
+
+        selected = []
+        for track in upcoming:
+            duration = track.duration_sec or self.DEFAULT_DURATION
+            if selected and before >= self.ahead + self._download_time(duration):
+                break
+            selected.append(track)
+            before += duration
+        return selected
+
+    async def start_preload(self, chat_id: int, count: Optional[int] = None) -> None:
         """
-        Preload a single track in the background.
-        
+        Bring a chat's preloads in line with its upcoming tracks.
+
+        Starts downloads for upcoming tracks that are missing and cancels
+        the ones that are no longer within the lookahead window.
+
         Args:
-            chat_id: The chat ID this track belongs to
-            track: Track object to preload
+            chat_id: The chat ID to preload tracks for
+            count: Number of upcoming tracks to preload (default: sized by
+                queue length and download speed)
         """
+        from HasiiMusic import queue
+
+        if count:
+            upcoming = queue.peek_next(chat_id, count)
+        else:
+            upcoming = self.window(chat_id)
+        self._windows[chat_id] = len(upcoming)
+
+        wanted = {}
+        for position, track in enumerate(upcoming):
+            track_id = getattr(track, "id", None)
+            if not track_id or queue.is_downloaded(track) or getattr(track, "is_live", False):
+                continue
+            wanted.setdefault(track_id, (position, track))
+
+        # Drop preloads that fell out of the window (skip, shuffle, remove)
+        for track_id in self._chats.get(chat_id, set()) - set(wanted):
+            self._unsubscribe(chat_id, track_id)
+
+        for track_id, (position, track) in wanted.items():
+            # Under load every chat still gets its next track, nothing more
+            busy = len(self._jobs) >= self.max_jobs
+            if position > 0 and track_id not in self._jobs and busy:
+                self.capped += 1
+                continue
+            priority = Priority.PRELOAD if position == 0 else Priority.PREFETCH
+            self._subscribe(chat_id, track, priority)
+
+    def _subscribe(self, chat_id: int, track, priority: Priority) -> None:
+        job = self._jobs.get(track.id)
+        if job is None:
+            job = self._jobs[track.id] = _Job(track.id)
+            job.task = asyncio.create_task(self._run(job, track, priority))
+        elif chat_id not in job.chats:
+            self.deduped += 1
+        job.chats.add(chat_id)
+        if not any(t is track for t in job.tracks):
+            job.tracks.append(track)
+        self._chats.setdefault(chat_id, set()).add(track.id)
+
+    def _unsubscribe(self, chat_id: int, track_id: str) -> None:
         from HasiiMusic import yt
-        
+
+        self._chats.get(chat_id, set()).discard(track_id)
+        job = self._jobs.get(track_id)
+        if not job:
+            return
+        job.chats.discard(chat_id)
+        if not job.chats and job.task and not job.task.done():
+            # A queued or running download is withdrawn through its lease so
+            # the thread stops before the slot is handed on; a job that has
+            # not reached the scheduler yet can simply be cancelled
+            if yt.cancel(track_id):
+                job.cancelled = True
+            else:
+                job.task.cancel()
+
+    async def _run(self, job: _Job, track, priority: Priority) -> None:
+        """Download one preloaded video and hand the file to every waiting queue item."""
+        from HasiiMusic import yt
+
         try:
-            track_id = track.id
-            is_live = getattr(track, 'is_live', False)
-            
-            # Download the track (uses existing semaphore for rate limiting)
-            file_path = await yt.download(track_id, is_live=is_live)
-            
+            async with self._slots:
+                await yt.materialize(track)
+                while True:
+                    job.cancelled = False
+                    file_path = await yt.download(track.id, priority=priority)
+                    # Withdrawn, then queued again before the download stopped
+                    if file_path or not job.cancelled or not job.chats:
+                        break
             if file_path:
-                # Update track with downloaded file path
-                track.file_path = file_path
+                for item in job.tracks:
+                    item.file_path = item.file_path or file_path
+                self.completed += 1
+            elif job.cancelled:
+                self.cancelled += 1
+            elif yt.was_preempted(track.id):
+                # Not an error: restarted by the next reconcile
+                self.preempted += 1
             else:
                 # Silent failure - track will download normally when needed
-                pass
-        
+                self.failed += 1
         except asyncio.CancelledError:
             # Task was cancelled (queue changed, playback stopped, etc.)
+            self.cancelled += 1
             raise
-        
         except Exception as e:
             # Log error but don't crash - track will be downloaded when it's time to play
-            logger.error(f"❌ Error preloading track {track.id} for chat {chat_id}: {e}")
-        
+            self.failed += 1
+            logger.error(f"❌ Error preloading track {job.video_id}: {e}")
         finally:
-            # Remove from preloading set
-            if chat_id in self._preloading and track.id in self._preloading[chat_id]:
-                self._preloading[chat_id].remove(track.id)
-    
+            self._jobs.pop(job.video_id, None)
+            for chat_id in job.chats:
+                self._chats.get(chat_id, set()).discard(job.video_id)
+
     async def cancel_preload(self, chat_id: int) -> None:
         """
         Cancel all active preload tasks for a chat.
-        
-        Called when:
-        - Queue is cleared
-        - Playback is stopped
-        - Track is skipped (may need to re-prioritize)
-        
+
+        Downloads that other chats still wait for keep running.
+
         Args:
             chat_id: The chat ID to cancel preloading for
         """
-        if chat_id not in self._preload_tasks:
+        self._windows.pop(chat_id, None)
+        for track_id in list(self._chats.pop(chat_id, set())):
+            self._unsubscribe(chat_id, track_id)
+
+    def record(self, media) -> None:
+        """Count whether a track about to play was already downloaded."""
+        if not media or getattr(media, "is_live", False):
             return
-        
-        tasks = self._preload_tasks[chat_id].copy()
-        
-        # Cancel all tasks
-        for task in tasks:
-            if not task.done():
-                task.cancel()
-        
-        # Wait for all tasks to finish cancellation
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Clean up tracking
-        self._preload_tasks[chat_id].clear()
-        if chat_id in self._preloading:
-            self._preloading[chat_id].clear()
-    
-    def _cleanup_task(self, chat_id: int, task: asyncio.Task) -> None:
-        """
-        Clean up completed task from tracking.
-        
-        Args:
-            chat_id: The chat ID this task belongs to
-            task: The completed task to clean up
-        """
-        if chat_id in self._preload_tasks:
-            self._preload_tasks[chat_id].discard(task)
+        if getattr(media, "file_path", None):
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        """Return preload counters for monitoring."""
+        played = self.hits + self.misses
+        windows = list(self._windows.values())
+        return {
+            "depth": self.depth,
+            "ahead": self.ahead,
+            "budget": self.budget,
+            "max_jobs": self.max_jobs,
+            "avg_window": sum(windows) / len(windows) if windows else 0.0,
+            "capped": self.capped,
+            "jobs": len(self._jobs),
+            "chats": sum(1 for ids in self._chats.values() if ids),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "preempted": self.preempted,
+            "deduped": self.deduped,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / played if played else 0.0,
+        }
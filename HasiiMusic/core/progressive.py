@@ -0,0 +1,197 @@
+# ==============================================================================
+# progressive.py - Growing-File Feeds for Progressive Playback
+# ==============================================================================
+# ffmpeg following a still-growing .part file never sees EOF: it keeps
+# waiting at the end of the file until its read timeout expires, so every
+# progressively started track ended with seconds of dead air.
+#
+# Instead, the player reads the download from a loopback HTTP server. Each
+# response copies the .part file as yt-dlp appends to it and ends as soon
+# as the download has finished and everything was sent, so the stream ends
+# on time.
+#
+# Features:
+# - Every connection (pytgcalls' probe, then ffmpeg) gets the whole file
+# - A download that stops growing for STALL seconds ends the response and
+#   is recorded as stalled; callers tell an early end from a normal one by
+#   that state instead of guessing from the playback position
+# - The .part file is read through one handle, so yt-dlp renaming it to
+#   the final name does not interrupt the feed
+# - Bound to 127.0.0.1 with an unguessable path per download
+# ==============================================================================
+
+import asyncio
+import secrets
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from HasiiMusic import logger
+
+# How a feed ended, as reported by state()
+DONE = "done"  # The download finished and the player got all of it
+STALLED = "stalled"  # The download stopped growing mid-track
+FAILED = "failed"  # The download ended without a file
+
+
+class _Download:
+    """A progressive download and how its latest feed ended."""
+
+    def __init__(self, part: str):
+        self.part = part
+        self.token = secrets.token_urlsafe(16)
+        self.finished = False
+        self.ok = False
+        self.state: Optional[str] = None
+
+
+class ProgressiveFeeds:
+    """
+    Serves growing .part files to the player until their download ends.
+
+    Usage:
+        feeds.track(part, download_task)
+        path = await feeds.open(part) or part  # media_path for ffmpeg
+        ...
+        if feeds.state(part) == STALLED: ...  # on StreamEnded
+    """
+
+    CHUNK = 64 * 1024
+    POLL = 0.2  # Seconds between checks of a file that is not growing
+    MAX_TRACKED = 200
+
+    def __init__(self, stall: int = 10):
+        """
+        Initialize the feeds.
+
+        Args:
+            stall: Seconds without download progress before a feed is
+                ended as stalled
+        """
+        self.stall = stall
+        self._downloads: Dict[str, _Download] = {}  # {part path: download}
+        self._tokens: Dict[str, _Download] = {}  # {URL path token: download}
+        self._runner: Optional[web.ServerRunner] = None
+        self._port = 0
+        self._lock = asyncio.Lock()
+
+        self.completed = 0
+        self.stalled = 0
+
+    def track(self, part: str, task: asyncio.Future) -> None:
+        """
+        Register the download writing a .part file.
+
+        Args:
+            part: Path of the growing .part file
+            task: Future of the download; its result is the final path or None
+        """
+        download = _Download(part)
+        self._downloads[part] = download
+        self._tokens[download.token] = download
+        while len(self._downloads) > self.MAX_TRACKED:
+            old = self._downloads.pop(next(iter(self._downloads)))
+            self._tokens.pop(old.token, None)
+
+        def _finished(done: asyncio.Future) -> None:
+            download.ok = not done.cancelled() and not done.exception() and bool(done.result())
+            download.finished = True
+
+        task.add_done_callback(_finished)
+
+    async def open(self, part: str) -> Optional[str]:
+        """
+        Return the URL the player should read a tracked .part file from.
+
+        Returns:
+            Optional[str]: Loopback URL, or None if the file is not being
+                downloaded (or the server could not start)
+        """
+        download = self._downloads.get(part)
+        if download is None:
+            return None
+        try:
+            await self._start()
+        except OSError as e:
+            logger.warning(f"Could not start progressive feed server: {e}")
+            return None
+        download.state = None
+        return f"http://127.0.0.1:{self._port}/{download.token}"
+
+    def state(self, part: str) -> Optional[str]:
+        """Return how the latest feed of a .part file ended (DONE, STALLED, FAILED or None)."""
+        download = self._downloads.get(part)
+        return download.state if download else None
+
+    async def _start(self) -> None:
+        async with self._lock:
+            if self._runner is not None:
+                return
+            runner = web.ServerRunner(web.Server(self._serve), access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            self._port = runner.addresses[0][1]
+            self._runner = runner
+
+    async def _serve(self, request: web.BaseRequest) -> web.StreamResponse:
+        """Stream one download to one reader until it finished or stalled."""
+        download = self._tokens.get(request.path.lstrip("/"))
+        if download is None:
+            return web.Response(status=404)
+        try:
+            src = open(download.part, "rb")
+        except FileNotFoundError:
+            # Finished before this reader arrived
+            try:
+                src = open(download.part[:-len(".part")], "rb")
+            except FileNotFoundError:
+                return web.Response(status=404)
+
+        response = web.StreamResponse()
+        response.content_type = "application/octet-stream"
+        await response.prepare(request)
+        try:
+            state = await self._copy(download, src, response)
+        except ConnectionResetError:
+            # Reader left early (the probe, or the stream was stopped)
+            return response
+        finally:
+            src.close()
+
+        # Recorded before the response ends: EOF ends the stream
+        download.state = state
+        if state == STALLED:
+            self.stalled += 1
+            logger.info(f"Progressive download of {download.part} stalled")
+        else:
+            self.completed += 1
+        try:
+            await response.write_eof()
+        except ConnectionResetError:
+            pass
+        return response
+
+    async def _copy(self, download: _Download, src, response: web.StreamResponse) -> str:
+        """Copy the download into the response until it finished or stalled."""
+        loop = asyncio.get_event_loop()
+        last_growth = loop.time()
+        while True:
+            chunk = src.read(self.CHUNK)
+            if chunk:
+                # Waits while the player is not reading (disconnects raise)
+                await response.write(chunk)
+                last_growth = loop.time()
+                continue
+            if download.finished:
+                # Anything appended between the last read and the end
+                while chunk := src.read(self.CHUNK):
+                    await response.write(chunk)
+                return DONE if download.ok else FAILED
+            if loop.time() - last_growth > self.stall:
+                return STALLED
+            await asyncio.sleep(self.POLL)
+
+    def stats(self) -> dict:
+        """Return feed counters for monitoring."""
+        return {"completed": self.completed, "stalled": self.stalled}
@@ -0,0 +1,236 @@
+# ==============================================================================
+# render.py - Now-Playing Thumbnail Compositor
+# ==============================================================================
+# The PIL half of thumbnail generation: artwork bytes and track fields in,
+# image file out. helpers/_thumbnails.py fetches the artwork and caches the
+# results; this module only draws.
+#
+# It imports nothing from the bot so it can run in worker processes
+# (RENDER_PROCESSES) as well as in the render thread pool. Each process
+# loads the fonts and builds the static layers once, when it starts.
+#
+# Features:
+# - Static layers (masks, progress bar, icons) built once per process
+# - JPEG artwork decoded at the smallest DCT scale covering the target
+# - Output written atomically in the configured format
+# ==============================================================================
+
+import os
+import re
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+# Modern frosted glass design constants
+PANEL_W, PANEL_H = 763, 545
+PANEL_X = (1280 - PANEL_W) // 2
+PANEL_Y = 88
+TRANSPARENCY = 170
+
+THUMB_W, THUMB_H = 542, 273
+THUMB_X = PANEL_X + (PANEL_W - THUMB_W) // 2
+THUMB_Y = PANEL_Y + 36
+
+TITLE_X = 377
+TITLE_Y = THUMB_Y + THUMB_H + 10
+META_Y = TITLE_Y + 45
+
+BAR_X, BAR_Y = 388, META_Y + 45
+BAR_RED_LEN = 280
+BAR_TOTAL_LEN = 480
+
+ICONS_W, ICONS_H = 415, 45
+ICONS_X = PANEL_X + (PANEL_W - ICONS_W) // 2
+ICONS_Y = BAR_Y + 48
+
+MAX_TITLE_WIDTH = 580
+
+# THUMB_FORMAT -> (file extension, PIL format)
+FORMATS = {
+    "jpeg": ("jpg", "JPEG"),
+    "webp": ("webp", "WEBP"),
+    "png": ("png", "PNG"),
+}
+
+
+def trim_to_width(text: str, font: ImageFont.FreeTypeFont, max_w: int) -> str:
+    """Trim text to fit within max width, adding ellipsis if needed."""
+    ellipsis = "…"
+    if font.getlength(text) <= max_w:
+        return text
+    for i in range(len(text) - 1, 0, -1):
+        if font.getlength(text[:i] + ellipsis) <= max_w:
+            return text[:i] + ellipsis
+    return ellipsis
+
+
+class Renderer:
+    """Fonts, static layers and output settings of one process."""
+
+    def __init__(self, fmt: str = "jpeg", quality: int = 85):
+        """
+        Load the fonts and build the static layers.
+
+        Args:
+            fmt: Output format (jpeg, webp or png)
+            quality: JPEG/WebP quality, 1-100
+        """
+        try:
+            self.title_font = ImageFont.truetype(
+                "HasiiMusic/helpers/Raleway-Bold.ttf", 32)
+            self.regular_font = ImageFont.truetype(
+                "HasiiMusic/helpers/Inter-Light.ttf", 18)
+        except OSError:
+            self.title_font = self.regular_font = ImageFont.load_default()
+
+        self.ext, self.format = FORMATS.get(fmt, FORMATS["jpeg"])
+        if self.format == "JPEG":
+            self.options = {"quality": quality, "optimize": True, "progressive": True}
+        elif self.format == "WEBP":
+            self.options = {"quality": quality, "method": 4}
+        else:
+            self.options = {"optimize": True}
+        self._build_layers()
+
+    def _build_layers(self) -> None:
+        """
+        Precompute everything that is the same on every thumbnail.
+
+        Renders only blur, resize and composite the artwork and draw the
+        title, metadata and duration on top of these layers.
+        """
+        # Frosted glass tint and the rounded-corner masks
+        self.panel_overlay = Image.new(
+            "RGBA", (PANEL_W, PANEL_H), (255, 255, 255, TRANSPARENCY))
+        self.panel_mask = Image.new("L", (PANEL_W, PANEL_H), 0)
+        ImageDraw.Draw(self.panel_mask).rounded_rectangle(
+            (0, 0, PANEL_W, PANEL_H), 50, fill=255)
+        self.thumb_mask = Image.new("L", (THUMB_W, THUMB_H), 0)
+        ImageDraw.Draw(self.thumb_mask).rounded_rectangle(
+            (0, 0, THUMB_W, THUMB_H), 20, fill=255)
+
+        # Progress bar, start label and control icons, drawn over the panel
+        self.decor = Image.new("RGBA", (1280, 720), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(self.decor)
+        draw.line([(BAR_X, BAR_Y), (BAR_X + BAR_RED_LEN, BAR_Y)],
+                  fill="red", width=6)
+        draw.line([(BAR_X + BAR_RED_LEN, BAR_Y),
+                  (BAR_X + BAR_TOTAL_LEN, BAR_Y)], fill="gray", width=5)
+        draw.ellipse([(BAR_X + BAR_RED_LEN - 7, BAR_Y - 7),
+                     (BAR_X + BAR_RED_LEN + 7, BAR_Y + 7)], fill="red")
+        draw.text((BAR_X, BAR_Y + 15), "00:00",
+                  fill="black", font=self.regular_font)
+
+        # Control icons (if available), recoloured black once
+        icons_path = "HasiiMusic/helpers/play_icons.png"
+        if os.path.isfile(icons_path):
+            with Image.open(icons_path) as icons_img:
+                alpha = icons_img.convert("RGBA").resize((ICONS_W, ICONS_H)).getchannel("A")
+            black_ic = Image.new("RGBA", (ICONS_W, ICONS_H), (0, 0, 0, 0))
+            black_ic.putalpha(alpha)
+            self.decor.alpha_composite(black_ic, (ICONS_X, ICONS_Y))
+
+    def render(
+        self,
+        artwork: bytes,
+        output: str,
+        title: str,
+        view_count: Optional[str],
+        duration: str,
+        is_live: bool = False,
+        size=(1280, 720),
+    ) -> str:
+        """
+        Compose a now-playing thumbnail and write it to output.
+
+        Args:
+            artwork: Encoded track artwork (JPEG/WebP/PNG bytes)
+            output: Path of the image to write
+            title: Track title
+            view_count: Short view count text (e.g. "1.2M views")
+            duration: Track duration text
+            is_live: Draw a red "Live" label instead of the duration
+            size: Size of the thumbnail
+
+        Returns:
+            str: The output path
+        """
+        # Prepare base image; JPEG artwork is decoded at the smallest
+        # DCT scale that still covers the target size
+        with Image.open(BytesIO(artwork)) as source:
+            source.draft("RGB", size)
+            base = source.resize(size, reducing_gap=2.0).convert("RGBA")
+
+        # Create blurred background
+        bg = ImageEnhance.Brightness(base.filter(
+            ImageFilter.BoxBlur(10))).enhance(0.6)
+
+        # Create frosted glass panel with rounded corners
+        panel_area = bg.crop(
+            (PANEL_X, PANEL_Y, PANEL_X + PANEL_W, PANEL_Y + PANEL_H))
+        frosted = Image.alpha_composite(panel_area, self.panel_overlay)
+        bg.paste(frosted, (PANEL_X, PANEL_Y), self.panel_mask)
+
+        # Add thumbnail with rounded corners
+        thumb = base.resize((THUMB_W, THUMB_H))
+        bg.paste(thumb, (THUMB_X, THUMB_Y), self.thumb_mask)
+
+        # Progress bar, start label and icons
+        if bg.size == self.decor.size:
+            bg.alpha_composite(self.decor)
+        else:
+            bg.alpha_composite(self.decor.crop((0, 0) + bg.size))
+
+        # Draw text elements
+        draw = ImageDraw.Draw(bg)
+
+        # Clean and display title
+        clean_title = re.sub(r"\W+", " ", title).title()
+        draw.text(
+            (TITLE_X, TITLE_Y),
+            trim_to_width(clean_title, self.title_font, MAX_TITLE_WIDTH),
+            fill="black",
+            font=self.title_font
+        )
+
+        # Metadata
+        draw.text(
+            (TITLE_X, META_Y),
+            f"YouTube | {view_count or 'Unknown Views'}",
+            fill="black",
+            font=self.regular_font
+        )
+
+        # Duration label
+        end_text = "Live" if is_live else duration
+        draw.text(
+            (BAR_X + BAR_TOTAL_LEN - (90 if is_live else 60), BAR_Y + 15),
+            end_text,
+            fill="red" if is_live else "black",
+            font=self.regular_font
+        )
+
+        # Save atomically so a half-written file is never served
+        if self.format == "JPEG":
+            bg = bg.convert("RGB")
+        bg.save(f"{output}.tmp", self.format, **self.options)
+        os.replace(f"{output}.tmp", output)
+        return output
+
+
+# Renderer of this process, built by warm()
+_renderer: Optional[Renderer] = None
+
+
+def warm(fmt: str = "jpeg", quality: int = 85) -> None:
+    """Build this process's renderer (worker process initializer)."""
+    global _renderer
+    _renderer = Renderer(fmt, quality)
+
+
+def render(*args) -> str:
+    """Render with this process's renderer; see Renderer.render for arguments."""
+    if _renderer is None:
+        warm()
+    return _renderer.render(*args)
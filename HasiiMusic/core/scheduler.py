@@ -0,0 +1,253 @@
+# ==============================================================================
+# scheduler.py - Priority-Aware Download Scheduler
+# ==============================================================================
+# Replaces the flat first-come-first-served download semaphore.
+#
+# Priority classes (lower value = served first):
+# - PLAY: a user just typed /play and is waiting
+# - NEXT: play_next after a stream ended, listeners hear silence
+# - PRELOAD: the next track in the queue
+# - PREFETCH: deeper speculative preloads
+#
+# Features:
+# - Free slots always go to the most urgent waiting request
+# - Running preloads are preempted when PLAY/NEXT requests are waiting
+# - Waiting or running work can be promoted when an urgent caller joins it
+# - Speculative work nobody wants any more is cancelled through its lease
+# - Per-class queue depth, wait time and preemption metrics
+# ==============================================================================
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, List, Optional, Set
+
+from HasiiMusic import logger
+
+
+class Priority(IntEnum):
+    PLAY = 0
+    NEXT = 1
+    PRELOAD = 2
+    PREFETCH = 3
+
+
+# Requests at or above this priority may preempt speculative work
+URGENT = Priority.NEXT
+
+
+class Lease:
+    """A single download's claim on (or place in line for) a slot."""
+
+    def __init__(self, priority: Priority):
+        self.priority = Priority(priority)
+        self.preempted = False  # Read by the download thread's progress hook
+        self.cancelled = False  # No caller wants the download any more
+        self.running = False
+        self.queued_at = 0.0
+        self._future: Optional[asyncio.Future] = None
+
+
+class _ClassStats:
+    """Counters for one priority class."""
+
+    def __init__(self):
+        self.granted = 0
+        self.preempted = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class DownloadScheduler:
+    """
+    Grants a fixed number of download slots in priority order.
+
+    Usage:
+        lease = scheduler.lease(Priority.PLAY)
+        async with scheduler.slot(lease):
+            ...  # download, checking lease.preempted from progress hooks
+    """
+
+    def __init__(self, slots: int = 5):
+        """
+        Initialize the scheduler.
+
+        Args:
+            slots: Maximum number of simultaneous downloads
+        """
+        self.slots = slots
+        self._running: Set[Lease] = set()
+        self._waiting: List[tuple] = []  # heap of (priority, seq, lease)
+        self._seq = itertools.count()
+        self._stats: Dict[Priority, _ClassStats] = {p: _ClassStats() for p in Priority}
+
+    def lease(self, priority: Priority = Priority.PLAY) -> Lease:
+        """Create a lease that can later be passed to slot()."""
+        return Lease(priority)
+
+    @asynccontextmanager
+    async def slot(self, lease: Lease):
+        """Hold a download slot for the duration of the block."""
+        await self.acquire(lease)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    async def acquire(self, lease: Lease) -> None:
+        """
+        Wait until the lease is granted a slot.
+
+        Returns without a slot (lease.running is False) if the lease is
+        cancelled while waiting.
+        """
+        lease.preempted = False
+        lease.queued_at = time.monotonic()
+        while True:
+            if len(self._running) < self.slots and not self._waiting:
+                self._grant(lease)
+                return
+
+            lease._future = asyncio.get_event_loop().create_future()
+            heapq.heappush(self._waiting, (lease.priority, next(self._seq), lease))
+            self._preempt()
+            try:
+                await lease._future
+            except asyncio.CancelledError:
+                if lease.running:
+                    # Granted just as we were cancelled; hand the slot on
+                    self.release(lease)
+                else:
+                    self._remove_waiting(lease)
+                raise
+            finally:
+                lease._future = None
+            if lease.running or lease.cancelled:
+                return
+            # Cancelled while waiting, then claimed by an urgent caller
+
+    def release(self, lease: Lease) -> None:
+        """Give a slot back and wake the most urgent waiter."""
+        if not lease.running:
+            return
+        lease.running = False
+        self._running.discard(lease)
+        self._dispatch()
+
+    def promote(self, lease: Lease, priority: Priority) -> None:
+        """
+        Raise a lease's priority when a more urgent caller joins its download.
+
+        Args:
+            lease: Lease to promote (waiting or running)
+            priority: New priority; ignored if not more urgent than current
+        """
+        if priority >= lease.priority:
+            return
+        lease.priority = Priority(priority)
+        if priority <= URGENT:
+            lease.cancelled = False
+        if lease.running:
+            # Urgent work is never preempted
+            if priority <= URGENT:
+                lease.preempted = False
+            return
+        for i, (_, seq, waiting) in enumerate(self._waiting):
+            if waiting is lease:
+                self._waiting[i] = (lease.priority, seq, lease)
+                heapq.heapify(self._waiting)
+                break
+        self._preempt()
+
+    def cancel(self, lease: Lease) -> None:
+        """
+        Withdraw a lease nobody waits for any more.
+
+        A waiting lease leaves the queue at once; a running one is preempted
+        and keeps its slot until the download thread has stopped.
+
+        Args:
+            lease: Lease to cancel (waiting or running)
+        """
+        lease.cancelled = True
+        if lease.running:
+            lease.preempted = True
+        elif lease._future is not None and not lease._future.done():
+            self._remove_waiting(lease)
+            lease._future.set_result(None)
+            self._preempt()
+
+    def _grant(self, lease: Lease) -> None:
+        lease.running = True
+        self._running.add(lease)
+        waited = time.monotonic() - lease.queued_at
+        stats = self._stats[lease.priority]
+        stats.granted += 1
+        stats.wait_total += waited
+        stats.wait_max = max(stats.wait_max, waited)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters in priority order."""
+        while self._waiting and len(self._running) < self.slots:
+            _, _, lease = heapq.heappop(self._waiting)
+            if lease._future is None or lease._future.done():
+                continue
+            self._grant(lease)
+            lease._future.set_result(None)
+
+    def _remove_waiting(self, lease: Lease) -> None:
+        self._waiting = [item for item in self._waiting if item[2] is not lease]
+        heapq.heapify(self._waiting)
+
+    def _preempt(self) -> None:
+        """
+        Ask running speculative downloads to stop while urgent work waits.
+
+        Only as many downloads are preempted as there are urgent waiters
+        not yet covered by an earlier preemption.
+        """
+        urgent = sum(1 for p, _, _ in self._waiting if p <= URGENT)
+        pending = sum(1 for lease in self._running if lease.preempted)
+        needed = urgent - pending - (self.slots - len(self._running))
+        if needed <= 0:
+            return
+
+        victims = sorted(
+            (lease for lease in self._running
+             if not lease.preempted and lease.priority > URGENT),
+            key=lambda lease: -lease.priority,
+        )
+        for lease in victims[:needed]:
+            lease.preempted = True
+            self._stats[lease.priority].preempted += 1
+            logger.debug(f"Preempting {lease.priority.name} download for urgent request")
+
+    def demand(self) -> int:
+        """Return how many downloads are running or waiting for a slot."""
+        return len(self._running) + len(self._waiting)
+
+    def depth(self, priority: Priority) -> int:
+        """Return how many requests of a class are waiting for a slot."""
+        return sum(1 for p, _, _ in self._waiting if p == priority)
+
+    def stats(self) -> dict:
+        """Return per-class queue depth, wait time and preemption metrics."""
+        classes = {}
+        for priority, stats in self._stats.items():
+            classes[priority.name.lower()] = {
+                "waiting": self.depth(priority),
+                "running": sum(1 for lease in self._running if lease.priority == priority),
+                "granted": stats.granted,
+                "preempted": stats.preempted,
+                "avg_wait": stats.wait_total / stats.granted if stats.granted else 0.0,
+                "max_wait": stats.wait_max,
+            }
+        return {
+            "slots": self.slots,
+            "running": len(self._running),
+            "waiting": len(self._waiting),
+            "classes": classes,
+        }
@@ -0,0 +1,138 @@
+# ==============================================================================
+# search.py - Tiered Search Result Cache
+# ==============================================================================
+# Caches YouTube search results so repeated /play requests skip VideosSearch.
+#
+# Tiers:
+# - Memory: O(1) LRU (OrderedDict) bounded by SEARCH_CACHE_SIZE
+# - MongoDB: "search" collection shared across restarts, expired by TTL index;
+#   written in the background so callers never wait for it
+#
+# Keys:
+# - "q:<query>": normalized search text (casefolded, whitespace collapsed)
+# - "id:<video id>": lets /play <url> reuse a result without searching
+# ==============================================================================
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from typing import Optional
+
+from HasiiMusic import db, logger
+from HasiiMusic.helpers import Track
+
+# Fields that describe the video; the rest belong to one playback
+_TRACK_FIELDS = (
+    "id", "channel_name", "duration", "duration_sec",
+    "title", "url", "thumbnail", "view_count", "is_live",
+)
+
+
+class SearchCache:
+    """
+    Two-tier cache of search results.
+
+    Cached Track objects are never handed out directly; callers receive a
+    copy carrying their own message ID, so one chat cannot modify the
+    track another chat is about to queue.
+    """
+
+    def __init__(self, size: int = 1000, ttl: int = 86400):
+        """
+        Initialize the cache.
+
+        Args:
+            size: Maximum number of results kept in memory
+            ttl: Seconds a result stays valid
+        """
+        self.size = size
+        self.ttl = ttl
+        # {key: (track, stored_at)}, least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._writes = set()  # Pending MongoDB writes (keeps the tasks alive)
+
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def query_key(query: str) -> str:
+        """Normalize a search query so case and spacing do not matter."""
+        return "q:" + " ".join(query.casefold().split())
+
+    @staticmethod
+    def id_key(video_id: str) -> str:
+        return f"id:{video_id}"
+
+    async def get(self, key: str, m_id: int) -> Optional[Track]:
+        """
+        Look up a cached result, checking memory before MongoDB.
+
+        Args:
+            key: Key from query_key() or id_key()
+            m_id: Message ID to attach to the returned copy
+
+        Returns:
+            Track copy or None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry and time.time() - entry[1] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return replace(entry[0], message_id=m_id)
+
+        try:
+            data = await db.get_search(key)
+        except Exception as e:
+            logger.debug(f"Search cache lookup failed for {key}: {e}")
+            data = None
+        if data:
+            track = Track(**data)
+            self._remember(key, track)
+            self.db_hits += 1
+            return replace(track, message_id=m_id)
+
+        self.misses += 1
+        return None
+
+    def put(self, track: Track, *keys: str) -> None:
+        """
+        Store a result under its video ID and any extra keys (e.g. the query).
+
+        The memory tier is updated at once; MongoDB is written in the
+        background.
+
+        Args:
+            track: Search result
+            keys: Additional keys that resolve to this track
+        """
+        clean = Track(**{field: getattr(track, field) for field in _TRACK_FIELDS})
+        keys = tuple(dict.fromkeys((self.id_key(track.id), *keys)))
+        for key in keys:
+            self._remember(key, clean)
+        task = asyncio.create_task(self._store(keys, asdict(clean)))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _store(self, keys: tuple, data: dict) -> None:
+        for key in keys:
+            try:
+                await db.set_search(key, data, self.ttl)
+            except Exception as e:
+                logger.debug(f"Search cache store failed for {key}: {e}")
+
+    def _remember(self, key: str, track: Track) -> None:
+        self._entries[key] = (track, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return cache counters for monitoring."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+        }
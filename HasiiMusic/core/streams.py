@@ -0,0 +1,142 @@
+# ==============================================================================
+# streams.py - Resolved Stream URL Cache
+# ==============================================================================
+# yt-dlp extraction costs 2-6 seconds per call. This module caches the
+# resolved googlevideo URLs of live and direct streams so that seeks,
+# replays and re-joins reuse them until they are about to expire.
+#
+# Features:
+# - Keyed by (video ID, format profile)
+# - TTL taken from the URL's own expire parameter
+# - Background refresh of URLs still in use shortly before they expire
+# - Invalidation when a URL stops working (e.g. HTTP 403)
+# - Concurrent lookups for the same key share one extraction
+# ==============================================================================
+
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from HasiiMusic import logger
+from HasiiMusic.core.inflight import SingleFlight
+
+# Matches the /expire/<unix time>/ segment of HLS/DASH manifest URLs
+_PATH_EXPIRE = re.compile(r"/expire/(\d+)")
+
+
+class StreamURLCache:
+    """
+    Cache of resolved stream URLs with expiry-aware refresh.
+
+    Args:
+        resolver: Coroutine function (video_id, fmt) -> URL or None
+        in_use: Callable returning video IDs that are playing or queued
+        refresh_ahead: Refresh entries this many seconds before they expire
+        default_ttl: Lifetime for URLs without an expire parameter
+    """
+
+    def __init__(
+        self,
+        resolver: Callable[[str, str], Awaitable[Optional[str]]],
+        in_use: Optional[Callable[[], Set[str]]] = None,
+        refresh_ahead: int = 600,
+        default_ttl: int = 1800,
+    ):
+        self._resolver = resolver
+        self._in_use = in_use
+        self.refresh_ahead = refresh_ahead
+        self.default_ttl = default_ttl
+
+        # {(video_id, fmt): (url, expires_at)}
+        self._entries: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._flights = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def expiry(url: str, default_ttl: int = 1800) -> float:
+        """
+        Return the unix time at which a googlevideo URL expires.
+
+        Direct URLs carry ?expire=<ts>, manifest URLs carry /expire/<ts>/.
+        """
+        expire = parse_qs(urlparse(url).query).get("expire", [None])[0]
+        if not expire:
+            match = _PATH_EXPIRE.search(url)
+            expire = match.group(1) if match else None
+        if expire and expire.isdigit():
+            return float(expire)
+        return time.time() + default_ttl
+
+    async def get(self, video_id: str, fmt: str) -> Optional[str]:
+        """
+        Return a fresh URL for a video, resolving it on a miss.
+
+        Args:
+            video_id: YouTube video ID
+            fmt: Format profile understood by the resolver (e.g. "audio", "live")
+        """
+        key = (video_id, fmt)
+        entry = self._entries.get(key)
+        if entry and entry[1] - time.time() > 60:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return await self._resolve(key)
+
+    async def _resolve(self, key: Tuple[str, str]) -> Optional[str]:
+        async def _run():
+            url = await self._resolver(*key)
+            if url:
+                self._entries[key] = (url, self.expiry(url, self.default_ttl))
+            return url
+
+        return await self._flights.run(f"{key[1]}:{key[0]}", _run)
+
+    def invalidate(self, video_id: str, fmt: Optional[str] = None) -> None:
+        """
+        Drop cached URLs for a video (all formats unless fmt is given).
+
+        Call this when a URL was rejected (HTTP 403) so the next lookup
+        extracts a new one.
+        """
+        for key in [k for k in self._entries if k[0] == video_id and fmt in (None, k[1])]:
+            self._entries.pop(key, None)
+            self.invalidations += 1
+
+    async def refresher(self, interval: int = 60) -> None:
+        """Background task: re-resolve in-use URLs shortly before they expire."""
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                now = time.time()
+                wanted = set(self._in_use()) if self._in_use else None
+                for key, (_, expires_at) in list(self._entries.items()):
+                    if expires_at - now > self.refresh_ahead:
+                        continue
+                    if wanted is not None and key[0] not in wanted:
+                        # Nobody is going to play it; let it expire
+                        if expires_at <= now:
+                            self._entries.pop(key, None)
+                        continue
+                    if await self._resolve(key):
+                        self.refreshes += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stream URL refresher error: {e}")
+
+    def stats(self) -> dict:
+        """Return cache counters for monitoring."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "invalidations": self.invalidations,
+        }
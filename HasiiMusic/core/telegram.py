@@ -10,12 +10,11 @@
 # ==============================================================================
 
 import asyncio
-import os
 import time
 
 from pyrogram import types
 
-from HasiiMusic import config
+from HasiiMusic import cache, config
 from HasiiMusic.helpers import Media, buttons, utils
 
 
@@ -100,7 +99,7 @@ class Telegram:
 
         try:
             file_path = f"downloads/{file_id}.{file_ext}"
-            if not os.path.exists(file_path):
+            if cache.lookup(f"{file_id}.{file_ext}") is None:
                 if file_id in self.active:
                     await sent.edit_text(sent.lang["dl_active"])
                     return await sent.stop_propagation()
@@ -113,6 +112,7 @@ class Telegram:
                 await task
                 self.active.remove(file_id)
                 self.active_tasks.pop(msg_id, None)
+                cache.add(file_path)
                 await sent.edit_text(
                     sent.lang["dl_complete"].format(
                         round(time.time() - start_time, 2))
@@ -0,0 +1,190 @@
+# ==============================================================================
+# transcode.py - Opus Transcode Cache for Repeat Plays
+# ==============================================================================
+# Every play hands the raw YouTube WebM to ffmpeg with large probe buffers
+# (-probesize 10M -analyzeduration 5M), so popular tracks pay the same
+# probe-and-decode cost on every play.
+#
+# Features:
+# - Tracks played again from the cache are converted in the background
+#   into a canonical Ogg/Opus file (48 kHz stereo, AudioQuality.HIGH)
+# - ffprobe results are stored beside the file ({id}.ogg.json)
+# - Plays of a transcoded file use light probe flags
+# - The transcoded file replaces the original download on disk
+# - Low CPU priority and a small concurrency limit
+# ==============================================================================
+
+import asyncio
+import json
+import os
+import shutil
+from typing import Dict, Optional, Tuple
+
+from HasiiMusic import logger
+
+# Light flags for files whose layout is known in advance
+LIGHT_PROBE = "-probesize 32k -analyzeduration 0"
+HEAVY_PROBE = "-probesize 10M -analyzeduration 5M"
+
+
+class Transcoder:
+    """
+    Converts cached downloads into Ogg/Opus files in the background.
+
+    Usage:
+        transcoder.submit(video_id, "downloads/abc.webm")
+        path, probe = transcoder.best("downloads/abc.webm")
+    """
+
+    EXT = "ogg"
+    BITRATE = "192k"  # Matches AudioQuality.HIGH
+    SAMPLE_RATE = 48000
+    CHANNELS = 2
+
+    def __init__(self, cache, enabled: bool = False, workers: int = 1):
+        """
+        Initialize the transcoder.
+
+        Args:
+            cache: FileCache of the downloads directory
+            enabled: Whether submit() does anything
+            workers: ffmpeg processes allowed to run at once
+        """
+        self.cache = cache
+        self.enabled = enabled and shutil.which("ffmpeg") is not None
+        self._slots = asyncio.Semaphore(max(1, workers))
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._nice = ["nice", "-n", "10"] if shutil.which("nice") else []
+
+        self.done = 0
+        self.failed = 0
+        self.hits = 0
+
+        if enabled and not self.enabled:
+            logger.warning("TRANSCODE_CACHE is on but ffmpeg was not found; disabled")
+
+    def path(self, video_id: str) -> str:
+        return str(self.cache.directory / f"{video_id}.{self.EXT}")
+
+    @staticmethod
+    def _sidecar(path: str) -> str:
+        return f"{path}.json"
+
+    def probe(self, path: str) -> Optional[dict]:
+        """Return the stored probe results of a transcoded file, or None."""
+        try:
+            with open(self._sidecar(path)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def best(self, path: str) -> Tuple[str, Optional[dict]]:
+        """
+        Return the file to play for a download path and its probe results.
+
+        Args:
+            path: Path of the downloaded file (or its .part file)
+
+        Returns:
+            (path, probe): The transcoded file and its probe if one exists,
+            otherwise the given path and None
+        """
+        video_id = self.cache.content_id(os.path.basename(path))
+        transcoded = self.path(video_id)
+        if os.path.exists(transcoded):
+            probe = self.probe(transcoded)
+            if probe:
+                self.hits += 1
+                return transcoded, probe
+        return path, None
+
+    def submit(self, video_id: str, source: str) -> None:
+        """Transcode a cached download in the background (if enabled)."""
+        if not self.enabled or video_id in self._tasks:
+            return
+        if source.endswith(f".{self.EXT}") or os.path.exists(self.path(video_id)):
+            return
+        task = asyncio.create_task(self._transcode(video_id, source))
+        self._tasks[video_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(video_id, None))
+
+    async def _run(self, *cmd: str) -> Tuple[int, bytes]:
+        proc = await asyncio.create_subprocess_exec(
+            *self._nice,
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        out, _ = await proc.communicate()
+        return proc.returncode, out
+
+    async def _transcode(self, video_id: str, source: str) -> None:
+        target = self.path(video_id)
+        tmp = f"{target}.tmp"
+        async with self._slots:
+            try:
+                code, _ = await self._run(
+                    "ffmpeg", "-nostdin", "-y", "-v", "error",
+                    "-i", source,
+                    "-vn", "-map_metadata", "-1",
+                    "-c:a", "libopus", "-b:a", self.BITRATE,
+                    "-ar", str(self.SAMPLE_RATE), "-ac", str(self.CHANNELS),
+                    "-f", "ogg", tmp,
+                )
+                if code != 0:
+                    raise RuntimeError(f"ffmpeg exited with {code}")
+                probe = await self._probe(tmp)
+                if not probe:
+                    raise RuntimeError("ffprobe found no audio stream")
+            except Exception as e:
+                self.failed += 1
+                logger.debug(f"Transcode of {video_id} failed: {e}")
+                for leftover in (tmp, self._sidecar(target)):
+                    try:
+                        os.remove(leftover)
+                    except OSError:
+                        pass
+                return
+
+        # Sidecar first: a transcoded file without one is never used
+        with open(self._sidecar(target), "w") as f:
+            json.dump(probe, f)
+        os.replace(tmp, target)
+        self.cache.add(target)
+        # Running ffmpeg processes keep reading the unlinked original
+        if os.path.exists(source):
+            self.cache.discard(source)
+        self.done += 1
+        logger.debug(f"Transcoded {video_id} to {self.EXT} ({probe['duration']:.0f}s)")
+
+    async def _probe(self, path: str) -> Optional[dict]:
+        """Run ffprobe once and keep what playback needs to know."""
+        code, out = await self._run(
+            "ffprobe", "-v", "quiet", "-print_format", "json",
+            "-show_format", "-show_streams", path,
+        )
+        if code != 0:
+            return None
+        data = json.loads(out or b"{}")
+        audio = next(
+            (s for s in data.get("streams", []) if s.get("codec_type") == "audio"), None
+        )
+        if not audio:
+            return None
+        return {
+            "codec": audio.get("codec_name"),
+            "sample_rate": int(audio.get("sample_rate") or 0),
+            "channels": int(audio.get("channels") or 0),
+            "duration": float(data.get("format", {}).get("duration") or 0),
+            "bit_rate": int(data.get("format", {}).get("bit_rate") or 0),
+        }
+
+    def stats(self) -> dict:
+        """Return transcode counters for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "running": len(self._tasks),
+            "done": self.done,
+            "failed": self.failed,
+            "hits": self.hits,
+        }
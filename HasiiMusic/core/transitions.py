@@ -0,0 +1,170 @@
+# ==============================================================================
+# transitions.py - Gapless Track Transitions
+# ==============================================================================
+# play_next used to start its work only when StreamEnded arrived: send a
+# message, maybe download, render the thumbnail, look the chat up, leave
+# and rejoin the call, and only then start the next stream. Listeners
+# heard seconds of silence between tracks.
+#
+# Features:
+# - Watches media.time against duration_sec of every playing track
+# - LEAD seconds before the end, prepares the next track: file, metadata,
+#   thumbnail and message routing (channel play lookup)
+# - A preparation is dropped if the next track changed meanwhile (skip,
+#   shuffle, remove)
+# - On StreamEnded the prepared stream is switched in first; messages are
+#   sent after the audio is already playing
+# - Gap between the end of a track and the start of the next is measured
+#   for every transition
+# ==============================================================================
+
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from HasiiMusic import config, db, logger, queue, yt
+from HasiiMusic.core.scheduler import Priority
+from HasiiMusic.helpers import Track, thumb
+
+
+class Prepared:
+    """Everything needed to start the next track without waiting."""
+
+    def __init__(self, media, thumb: str, message_chat_id: Optional[int]):
+        self.media = media
+        self.thumb = thumb
+        self.message_chat_id = message_chat_id
+        self.at = time.monotonic()
+
+
+class TransitionEngine:
+    """
+    Prepares the next track of every chat shortly before the current one ends.
+
+    Usage:
+        asyncio.create_task(engine.watcher())
+        ...
+        prepared = engine.take(chat_id)  # in play_next
+    """
+
+    def __init__(self, calls, lead: int = 10):
+        """
+        Initialize the engine.
+
+        Args:
+            calls: The TgCall handler (for message routing lookups)
+            lead: Seconds before the end of a track to prepare the next one
+        """
+        self.calls = calls
+        self.lead = lead
+        self._prepared: Dict[int, Prepared] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._ended: Dict[int, float] = {}
+        self._gaps = deque(maxlen=100)  # (seconds, fast) of recent transitions
+
+        self.fast = 0
+        self.slow = 0
+
+    def due(self, media) -> bool:
+        """Check whether a playing track is close enough to its end."""
+        if not media or getattr(media, "is_live", False) or not media.duration_sec:
+            return False
+        return media.duration_sec - media.time <= self.lead
+
+    async def watcher(self, interval: float = 1.0) -> None:
+        """Background task: prepare next tracks as current ones near their end."""
+        while True:
+            await asyncio.sleep(interval)
+            for chat_id in list(db.active_calls):
+                try:
+                    if chat_id in self._prepared or chat_id in self._tasks:
+                        continue
+                    if not await db.playing(chat_id):
+                        continue
+                    if self.due(queue.get_current(chat_id)):
+                        task = asyncio.create_task(self._prepare(chat_id))
+                        self._tasks[chat_id] = task
+                        task.add_done_callback(lambda _, c=chat_id: self._tasks.pop(c, None))
+                except Exception as e:
+                    logger.debug(f"Transition watcher error for {chat_id}: {e}")
+
+    async def _prepare(self, chat_id: int) -> None:
+        # Single-track loop replays the current track; nothing to prepare
+        if await db.get_loop(chat_id) == 1:
+            return
+        media = target = queue.get_next(chat_id, check=True)
+        if not media:
+            return
+        try:
+            media = await yt.materialize(media)
+            if not media.file_path:
+                media.file_path = await yt.download(
+                    media.id, is_live=getattr(media, "is_live", False), priority=Priority.NEXT
+                )
+                if not media.file_path:
+                    return
+            if config.THUMB_GEN and isinstance(media, Track):
+                _thumb = await thumb.generate(media)
+            else:
+                _thumb = config.DEFAULT_THUMB
+            message_chat_id = await self.calls.message_chat(chat_id)
+        except Exception as e:
+            logger.debug(f"Could not prepare next track for {chat_id}: {e}")
+            return
+        if queue.get_next(chat_id, check=True) is not target:
+            # Queue changed while we were preparing; the watcher starts over
+            logger.debug(f"Dropped stale preparation for {chat_id}: {media.title}")
+            return
+        self._prepared[chat_id] = Prepared(media, _thumb, message_chat_id)
+        logger.debug(f"Prepared next track for {chat_id}: {media.title}")
+
+    def take(self, chat_id: int) -> Optional[Prepared]:
+        """
+        Hand out the prepared transition of a chat (once).
+
+        The caller still checks that prepared.media is the track about to
+        play; the queue may change between take() and picking the track.
+        """
+        return self._prepared.pop(chat_id, None)
+
+    def cancel(self, chat_id: int) -> None:
+        """Drop a chat's preparation (e.g. on /stop)."""
+        self._prepared.pop(chat_id, None)
+        self._ended.pop(chat_id, None)
+        task = self._tasks.pop(chat_id, None)
+        if task:
+            task.cancel()
+
+    def ended(self, chat_id: int) -> None:
+        """Mark the moment a chat's stream ended (starts the gap clock)."""
+        self._ended[chat_id] = time.monotonic()
+
+    def started(self, chat_id: int, fast: bool) -> None:
+        """Record the gap when the next stream of a chat has started."""
+        ended = self._ended.pop(chat_id, None)
+        if ended is None:
+            return  # Not a transition (first play, skip, seek)
+        gap = time.monotonic() - ended
+        self._gaps.append((gap, fast))
+        if fast:
+            self.fast += 1
+        else:
+            self.slow += 1
+        logger.debug(f"Transition in {chat_id}: {gap * 1000:.0f}ms gap ({'fast' if fast else 'slow'})")
+
+    def stats(self) -> dict:
+        """Return transition counters and gap lengths for monitoring."""
+        gaps = [gap for gap, _ in self._gaps]
+        fast = [gap for gap, was_fast in self._gaps if was_fast]
+        slow = [gap for gap, was_fast in self._gaps if not was_fast]
+        return {
+            "prepared": len(self._prepared),
+            "fast": self.fast,
+            "slow": self.slow,
+            "avg_gap": sum(gaps) / len(gaps) if gaps else 0.0,
+            "max_gap": max(gaps, default=0.0),
+            "avg_fast": sum(fast) / len(fast) if fast else 0.0,
+            "avg_slow": sum(slow) / len(slow) if slow else 0.0,
+            "last_gap": gaps[-1] if gaps else 0.0,
+        }
@@ -0,0 +1,213 @@
+# ==============================================================================
+# tuning.py - Adaptive Download Tuning
+# ==============================================================================
+# Picks yt-dlp's fragment concurrency and HTTP chunk size per download
+# instead of using fixed values.
+#
+# Features:
+# - Global connection budget shared by all running downloads; a download
+#   waits when every connection is taken
+# - A lone download gets many connections, parallel downloads back off
+# - Chunk size follows measured throughput (about CHUNK_SECONDS of data)
+# - Per-host throughput and error rates from yt-dlp progress hooks; a new
+#   download is sized from the stats of the host it will most likely hit
+# - Recent errors halve both concurrency and chunk size
+# ==============================================================================
+
+import asyncio
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+KB = 1024
+MB = 1024 * 1024
+
+
+class _HostStats:
+    """Smoothed throughput and error rate for one host."""
+
+    def __init__(self):
+        self.speed = 0.0  # EWMA of bytes/second
+        self.errors = 0.0  # EWMA of failed downloads (0..1)
+        self.downloads = 0
+
+
+class Allocation:
+    """Connections and chunk size granted to one download."""
+
+    def __init__(self, fragments: int, chunk: int):
+        self.fragments = fragments
+        self.chunk = chunk
+        self.host: Optional[str] = None
+        self.speed = 0.0
+        self.failed = False
+
+    @property
+    def params(self) -> dict:
+        """yt-dlp option overrides for this download."""
+        return {
+            "concurrent_fragment_downloads": self.fragments,
+            "http_chunk_size": self.chunk,
+        }
+
+
+class DownloadTuner:
+    """
+    Shares a connection budget between downloads and sizes their chunks.
+
+    Usage:
+        alloc = await tuner.acquire()
+        ...  # download with alloc.params, calling tuner.observe(alloc, status)
+        tuner.release(alloc, ok=True)
+    """
+
+    MAX_FRAGMENTS = 8
+    MIN_CHUNK = 256 * KB
+    MAX_CHUNK = 10 * MB  # YouTube throttles larger range requests
+    DEFAULT_CHUNK = 512 * KB
+    CHUNK_SECONDS = 2.0  # Aim for one range request every ~2 seconds
+    ALPHA = 0.3  # Weight of the newest sample in the moving averages
+
+    def __init__(self, budget: int = 20):
+        """
+        Initialize the tuner.
+
+        Args:
+            budget: Total connections all downloads may open together
+        """
+        self.budget = max(1, budget)
+        self._allocated = 0
+        self._active = 0
+        self._hosts: Dict[str, _HostStats] = {}
+        self._all = _HostStats()  # Aggregate over every host
+        self._last_host: Optional[str] = None  # Host of the latest finished download
+        self._freed = asyncio.Event()  # Set whenever connections are returned
+        self._lock = threading.Lock()
+
+        self.waited = 0  # Downloads that had to wait for a free connection
+
+    async def acquire(self, demand: int = 1, host: Optional[str] = None) -> Allocation:
+        """
+        Wait until a connection is free and grant a download its share.
+
+        Args:
+            demand: See allocate()
+            host: See allocate()
+        """
+        alloc = self.allocate(demand, host)
+        if alloc is None:
+            self.waited += 1
+        while alloc is None:
+            self._freed.clear()
+            await self._freed.wait()
+            alloc = self.allocate(demand, host)
+        return alloc
+
+    def allocate(self, demand: int = 1, host: Optional[str] = None) -> Optional[Allocation]:
+        """
+        Grant a new download its share of the budget.
+
+        Args:
+            demand: Downloads running or waiting, including this one; the
+                budget is split between them so early starters do not take
+                connections the rest of a burst will need
+            host: Host the download is expected to hit; defaults to the host
+                of the latest download (googlevideo keeps serving a client
+                from the same edge hosts). Unknown hosts use the aggregate.
+
+        Returns:
+            Optional[Allocation]: None if the whole budget is in use
+        """
+        with self._lock:
+            free = self.budget - self._allocated
+            if free <= 0:
+                return None
+            self._active += 1
+            fair = self.budget // max(self._active, demand)
+            fragments = max(1, min(self.MAX_FRAGMENTS, fair, free))
+
+            stats = self._hosts.get(host or self._last_host)
+            if stats is None or not stats.downloads:
+                stats = self._all
+
+            if stats.speed:
+                chunk = int(stats.speed * self.CHUNK_SECONDS)
+            else:
+                chunk = self.DEFAULT_CHUNK
+
+            # Back off while downloads keep failing
+            if stats.errors > 0.2:
+                fragments = max(1, fragments // 2)
+                chunk //= 2
+
+            chunk = max(self.MIN_CHUNK, min(self.MAX_CHUNK, chunk))
+            self._allocated += fragments
+            return Allocation(fragments, chunk)
+
+    def observe(self, alloc: Allocation, status: dict) -> None:
+        """
+        Record a yt-dlp progress update (called from download threads).
+
+        Args:
+            alloc: Allocation of the download reporting progress
+            status: Progress hook dictionary from yt-dlp
+        """
+        if alloc.host is None:
+            url = (status.get("info_dict") or {}).get("url") or ""
+            alloc.host = urlparse(url).netloc or "unknown"
+        if status.get("status") == "error":
+            alloc.failed = True
+        speed = status.get("speed")
+        if speed:
+            # Single progress updates swing widely; keep a moving average
+            if alloc.speed:
+                alloc.speed += self.ALPHA * (speed - alloc.speed)
+            else:
+                alloc.speed = speed
+
+    def release(self, alloc: Allocation, ok: bool) -> None:
+        """
+        Return a download's connections and fold its results into the stats.
+
+        Args:
+            alloc: Allocation from allocate()
+            ok: Whether the download succeeded (preempted counts as ok)
+        """
+        failed = alloc.failed or not ok
+        with self._lock:
+            self._allocated -= alloc.fragments
+            self._active -= 1
+            name = alloc.host or "unknown"
+            host = self._hosts.setdefault(name, _HostStats())
+            if alloc.host:
+                self._last_host = alloc.host
+            if len(self._hosts) > 200:
+                # googlevideo spreads traffic over many hosts; forget the rarest
+                rarest = min(self._hosts, key=lambda n: self._hosts[n].downloads)
+                if rarest != name:
+                    del self._hosts[rarest]
+            for stats in (host, self._all):
+                stats.downloads += 1
+                stats.errors += self.ALPHA * (float(failed) - stats.errors)
+                if alloc.speed:
+                    if stats.speed:
+                        stats.speed += self.ALPHA * (alloc.speed - stats.speed)
+                    else:
+                        stats.speed = alloc.speed
+        self._freed.set()
+
+    def stats(self) -> dict:
+        """Return budget usage and per-host throughput for monitoring."""
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "allocated": self._allocated,
+                "active": self._active,
+                "waited": self.waited,
+                "speed": self._all.speed,
+                "errors": self._all.errors,
+                "hosts": {
+                    name: {"speed": h.speed, "errors": h.errors, "downloads": h.downloads}
+                    for name, h in self._hosts.items()
+                },
+            }
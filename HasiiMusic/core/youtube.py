@@ -4,6 +4,7 @@
 # This file handles all YouTube-related operations:
 # - Searching for videos/audio
 # - Downloading YouTube content using yt-dlp
+# - Resolving direct audio URLs (STREAM_MODE=direct) with expiry tracking
 # - Managing YouTube cookies for age-restricted content
 # - Caching search results for better performance
 # - Validating YouTube URLs
@@ -11,26 +12,78 @@
 
 import os
 import re
+import time
 import yt_dlp
-import random
 import asyncio
-import aiohttp
+import hashlib
+from collections import Counter
+from http.cookiejar import LoadError, MozillaCookieJar
+from dataclasses import replace
 from pathlib import Path
 from typing import Optional, Union
 
 from pyrogram import enums, types
-from py_yt import Playlist, VideosSearch
-from HasiiMusic import logger
+from py_yt import VideosSearch
+from HasiiMusic import cache, config, db, executors, http, logger, queue
+from HasiiMusic.core.cookies import CookiePool
+from HasiiMusic.core.extractors import ExtractorPool
+from HasiiMusic.core.inflight import SingleFlight
+from HasiiMusic.core.loudness import LoudnessAnalyzer
+from HasiiMusic.core.playlists import PlaylistEngine
+from HasiiMusic.core.progressive import ProgressiveFeeds
+from HasiiMusic.core.scheduler import URGENT, DownloadScheduler, Lease, Priority
+from HasiiMusic.core.search import SearchCache
+from HasiiMusic.core.transcode import Transcoder
+from HasiiMusic.core.tuning import DownloadTuner
+from HasiiMusic.core.streams import StreamURLCache
 from HasiiMusic.helpers import Track, utils
 
+# yt-dlp option profiles; pooled instances are shared per profile and cookie
+DOWNLOAD_OPTS = {
+    "outtmpl": "downloads/%(id)s.%(ext)s",
+    "quiet": True,
+    "noplaylist": True,
+    "geo_bypass": True,
+    "no_warnings": True,
+    "overwrites": False,
+    "nocheckcertificate": True,
+    "continuedl": True,
+    "noprogress": True,
+    # Starting values only: DownloadTuner sets both per download from the
+    # connection budget and measured throughput (see core/tuning.py)
+    "concurrent_fragment_downloads": 4,
+    "http_chunk_size": 524288,
+    "socket_timeout": 30,  # Increased from 15s (prevents timeout on slow networks)
+    "retries": 2,  # Increased from 1 (better reliability)
+    "fragment_retries": 2,  # Increased from 1 (handle network hiccups)
+    "ignoreerrors": True,
+    # High-quality audio: Opus codec in WebM container for best quality
+    "format": "bestaudio[ext=webm][acodec=opus]/bestaudio[acodec=opus]/bestaudio",
+    "postprocessors": [],  # No post-processing to preserve original quality
+}
+
+AUDIO_URL_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "noplaylist": True,
+    "geo_bypass": True,
+    "format": "bestaudio[acodec=opus]/bestaudio",
+}
+
+LIVE_URL_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "format": "bestaudio/best",
+}
+
 
 class YouTube:
     def __init__(self):
         """Initialize YouTube handler with configuration and caching."""
         self.base = "https://www.youtube.com/watch?v="  # Base YouTube URL
-        self.cookies = []  # List of available cookie files
-        self.checked = False  # Whether cookies directory has been checked
+        self.cookies = CookiePool("HasiiMusic/cookies")  # Health-scored cookie files
         self.warned = False  # Whether missing cookies warning has been shown
+        self._cookie_sources = {}  # {COOKIE_URL link: cookie file it produced}
 
         # Regular expression to match YouTube URLs (videos, shorts, playlists)
         self.regex = re.compile(
@@ -39,63 +92,179 @@ class YouTube:
             r"([A-Za-z0-9_-]{11}|PL[A-Za-z0-9_-]+)([&?][^\s]*)?"
         )
 
-        # Cache search results to reduce API calls (10 minute TTL)
-        self.search_cache = {}  # {"query_video": (result, timestamp)}
-        self.cache_time = {}  # Deprecated, using tuple in search_cache instead
+        # Cache search results in memory and MongoDB to reduce API calls
+        self.search_cache = SearchCache(config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL)
+
+        # Playlist pages cached by list ID, queued in batches as chats need them
+        self.playlists = PlaylistEngine(config.PLAYLIST_CACHE_TTL)
 
         # **PERFORMANCE FIX**: Limit concurrent downloads to prevent bandwidth saturation
         # With 15-20 groups, unlimited concurrent downloads cause 320+ connections
-        self._download_semaphore = asyncio.Semaphore(5)  # Max 5 simultaneous downloads
+        # Slots are handed out by priority: /play > play_next > preload > prefetch
+        self.scheduler = DownloadScheduler(config.DOWNLOAD_WORKERS)  # Default: 5 simultaneous downloads
+        self._leases = {}  # {video_id: Lease} for downloads waiting or running
+        self._preempted = {}  # {video_id: True} of downloads that gave way to urgent ones
+
+        # Fragment concurrency and chunk size within a global connection budget
+        self.tuner = DownloadTuner(config.CONNECTION_BUDGET)
+
+        # Repeat plays are converted to Opus so they start with light probing
+        self.transcoder = Transcoder(cache, config.TRANSCODE_CACHE, config.TRANSCODE_WORKERS)
+
+        # Loudness is measured once per video and applied in every chat
+        self.loudness = LoudnessAnalyzer(db, config.LOUDNESS_NORMALIZE, config.LOUDNESS_TARGET)
+
+        # In-flight downloads keyed by video ID; concurrent callers share one run
+        # inflight.active() reports how many callers wait on each download
+        self.inflight = SingleFlight()
+        self.searches = SingleFlight()  # Same for identical searches
+
+        # Warm YoutubeDL instances reused across downloads and URL lookups
+        self.extractors = ExtractorPool()
+
+        # Resolved live/direct stream URLs, refreshed while tracks are queued
+        self.streams = StreamURLCache(self._resolve_url, in_use=queue.active_ids)
+
+        # Progressive playback: ffmpeg reads growing downloads until they finish
+        self.feeds = ProgressiveFeeds(config.PROGRESSIVE_STALL)
+
+        # Direct stream mode: play counts of replayed tracks
+        self._plays = Counter()
+        self._background = set()  # Background downloads of replayed tracks
 
     def get_cookies(self):
-        if not self.checked:
-            for file in os.listdir("HasiiMusic/cookies"):
-                if file.endswith(".txt"):
-                    self.cookies.append(file)
-            self.checked = True
-        if not self.cookies:
+        # Healthy cookies are picked more often, bot-flagged ones sit out a while
+        cookie = self.cookies.choose()
+        if not cookie:
             if not self.warned:
                 self.warned = True
                 logger.warning("Cookies are missing; downloads might fail.")
             return None
-        return f"HasiiMusic/cookies/{random.choice(self.cookies)}"
+        return cookie
+
+    def _drop_cookie(self, cookie: Optional[str]) -> None:
+        """Remove a corrupted cookie file from rotation and disk."""
+        if not cookie:
+            return
+        # Pooled instances would write their cookie jar back when closed
+        self.extractors.drop_cookie(cookie)
+        self.cookies.remove(cookie, delete=True)
+
+    @staticmethod
+    def _is_bot_check(error_msg: str) -> bool:
+        return "Sign in to confirm" in error_msg or "bot" in error_msg.lower()
+
+    @staticmethod
+    def _is_auth_error(error_msg: str) -> bool:
+        # Errors a different (or fresh) cookie would fix
+        msg = error_msg.lower()
+        return any(s in msg for s in ("sign in", "login", "log in", "cookies", "age-restricted"))
 
     async def save_cookies(self, urls: list[str]) -> None:
+        """
+        Download cookie files from COOKIE_URL links concurrently.
+
+        Each file is validated as a Netscape cookie jar and named after its
+        content hash, so the same cookies are never stored twice and an
+        unchanged link does not create a new file on every refresh.
+        """
         logger.info("🍪 Saving cookies from urls...")
-        saved_count = 0
-        for url in urls:
-            try:
-                path = f"HasiiMusic/cookies/cookie{random.randint(10000, 99999)}.txt"
-                link = url.replace("me/", "me/raw/")
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(link) as resp:
-                        if resp.status != 200:
-                            logger.error(f"❌ Cookie download failed: HTTP {resp.status} from {url}")
-                            continue
-                        content = await resp.read()
-                        if not content or len(content) < 50:
-                            logger.error(f"❌ Cookie file empty or invalid from {url}")
-                            continue
-                        with open(path, "wb") as fw:
-                            fw.write(content)
-                        if os.path.exists(path) and os.path.getsize(path) > 0:
-                            saved_count += 1
-                            # Add the new cookie file to the list immediately
-                            cookie_filename = os.path.basename(path)
-                            if cookie_filename not in self.cookies:
-                                self.cookies.append(cookie_filename)
-                            logger.info(f"✅ Saved: {cookie_filename} ({len(content)} bytes)")
-            except Exception as e:
-                logger.error(f"❌ Cookie download error from {url}: {e}")
-        
-        # Force refresh of cookie list after download
-        self.checked = True
-        
+        known = self._cookie_hashes()
+        results = await asyncio.gather(
+            *(self._fetch_cookie(url, known) for url in urls)
+        )
+        saved_count = sum(1 for name in results if name)
+
+        # Pick up cookie files that were already on disk as well
+        self.cookies.scan()
+
         if saved_count > 0:
             logger.info(f"✅ Cookies saved. ({saved_count} file(s))")
         else:
             logger.error("❌ No cookies saved! Check COOKIE_URL in .env. YouTube downloads will fail!")
 
+    async def _fetch_cookie(self, url: str, known: dict) -> Optional[str]:
+        """Download and validate one cookie file, returning its file name."""
+        try:
+            link = url.replace("me/", "me/raw/")
+            status, content = await http.fetch(link, timeout=30)
+            if status != 200:
+                logger.error(f"❌ Cookie download failed: HTTP {status} from {url}")
+                return None
+        except Exception as e:
+            logger.error(f"❌ Cookie download error from {url}: {e}")
+            return None
+
+        digest = hashlib.sha1(content).hexdigest()
+        name = known.get(digest)
+        if name is None:
+            name = f"cookie_{digest[:12]}.txt"
+            path = f"HasiiMusic/cookies/{name}"
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as fw:
+                fw.write(content)
+            error = self._validate_cookie(tmp)
+            if error:
+                os.remove(tmp)
+                logger.error(f"❌ Cookie file from {url} rejected: {error}")
+                return None
+            os.replace(tmp, path)
+            known[digest] = name
+            logger.info(f"✅ Saved: {name} ({len(content)} bytes)")
+
+        # A link whose content changed replaces the file it produced before
+        old = self._cookie_sources.get(url)
+        self._cookie_sources[url] = name
+        if old and old != name and old not in self._cookie_sources.values():
+            self._drop_cookie(f"HasiiMusic/cookies/{old}")
+            logger.info(f"🍪 Replaced {old} with {name}")
+
+        # Add the new cookie file to the pool immediately
+        self.cookies.add(name)
+        return name
+
+    @staticmethod
+    def _validate_cookie(path: str) -> Optional[str]:
+        """Return why a file is not a usable Netscape cookie jar, or None."""
+        jar = MozillaCookieJar(path)
+        try:
+            jar.load(ignore_discard=True, ignore_expires=True)
+        except (LoadError, OSError) as e:
+            return f"not a Netscape cookie file ({e})"
+        if not any("youtube" in cookie.domain for cookie in jar):
+            return "no YouTube cookies in file"
+        return None
+
+    @staticmethod
+    def _cookie_hashes() -> dict:
+        """Return {sha1: file name} of the cookie files already on disk."""
+        hashes = {}
+        try:
+            for name in os.listdir("HasiiMusic/cookies"):
+                if name.endswith(".txt"):
+                    with open(f"HasiiMusic/cookies/{name}", "rb") as f:
+                        hashes.setdefault(hashlib.sha1(f.read()).hexdigest(), name)
+        except OSError:
+            pass
+        return hashes
+
+    async def refresh_cookies(self, urls: list[str], interval: int) -> None:
+        """
+        Background task: fetch cookies now and then every interval minutes.
+
+        Runs after boot so startup never waits on the cookie links.
+        """
+        while True:
+            try:
+                await self.save_cookies(urls)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to download cookies: {e}")
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval * 60)
+
     def valid(self, url: str) -> bool:
         return bool(re.match(self.regex, url))
 
@@ -126,17 +295,25 @@ class YouTube:
         return None
 
     async def search(self, query: str, m_id: int) -> Track | None:
-        # Check cache first (10-minute TTL)
-        cache_key = query
-        current_time = asyncio.get_event_loop().time()
-
-        if cache_key in self.search_cache:
-            cached_result, cache_timestamp = self.search_cache[cache_key]
-            if current_time - cache_timestamp < 600:  # 10 minutes
-                # Return cached result with new message_id
-                cached_result.message_id = m_id
-                return cached_result
+        # A YouTube link names its video, so a known ID needs no search at all
+        match = self.regex.search(query)
+        video_id = match.group(5) if match and len(match.group(5)) == 11 else None
+        key = SearchCache.id_key(video_id) if video_id else SearchCache.query_key(query)
+
+        cached = await self.search_cache.get(key, m_id)
+        if cached:
+            return cached
+
+        # Identical searches from several chats share one request
+        track = await self.searches.run(key, lambda: self._search(query))
+        if not track:
+            return None
+        # Also stored under its video ID, so a later link to it is a hit
+        self.search_cache.put(track, key)
+        return replace(track, message_id=m_id)
 
+    async def _search(self, query: str) -> Track | None:
+        """Run a VideosSearch and build a Track from the first result."""
         _search = VideosSearch(query, limit=1)
         results = await _search.next()
         if results and results["result"]:
@@ -144,12 +321,11 @@ class YouTube:
             duration = data.get("duration")
             is_live = duration is None or duration == "LIVE"
 
-            track = Track(
+            return Track(
                 id=data.get("id"),
                 channel_name=data.get("channel", {}).get("name"),
                 duration=duration if not is_live else "LIVE",
                 duration_sec=0 if is_live else utils.to_seconds(duration),
-                message_id=m_id,
                 title=data.get("title")[:25],
                 thumbnail=data.get(
                     "thumbnails", [{}])[-1].get("url").split("?")[0],
@@ -157,120 +333,41 @@ class YouTube:
                 view_count=data.get("viewCount", {}).get("short"),
                 is_live=is_live,
             )
+        return None
 
-            # Cache the result
-            self.search_cache[cache_key] = (track, current_time)
-            # Limit cache size to 100 entries
-            if len(self.search_cache) > 100:
-                oldest_key = min(self.search_cache.keys(),
-                                 key=lambda k: self.search_cache[k][1])
-                del self.search_cache[oldest_key]
+    async def materialize(self, track: Track) -> Track:
+        """
+        Fill in metadata that playlist placeholders do not carry.
 
+        Playlist pages have no view count (and sometimes no channel), so
+        queued playlist entries are completed from a video-ID search,
+        which the search cache usually answers without a request.
+        """
+        if not isinstance(track, Track) or not track.placeholder:
             return track
-        return None
-
-    async def playlist(self, limit: int, user: str, url: str) -> list[Track]:
         try:
-            plist = await Playlist.get(url)
-            tracks = []
-
-            # Check if plist has videos
-            if not plist or "videos" not in plist or not plist["videos"]:
-                return []
-
-            for data in plist["videos"][:limit]:
-                try:
-                    # Get thumbnail safely
-                    thumbnails = data.get("thumbnails", [])
-                    thumbnail_url = ""
-                    if thumbnails and len(thumbnails) > 0:
-                        thumbnail_url = thumbnails[-1].get(
-                            "url", "").split("?")[0]
-
-                    # Get link safely
-                    link = data.get("link", "")
-                    if "&list=" in link:
-                        link = link.split("&list=")[0]
-
-                    track = Track(
-                        id=data.get("id", ""),
-                        channel_name=data.get("channel", {}).get("name", ""),
-                        duration=data.get("duration", "0:00"),
-                        duration_sec=utils.to_seconds(
-                            data.get("duration", "0:00")),
-                        title=(data.get("title", "Unknown")[:25]),
-                        thumbnail=thumbnail_url,
-                        url=link,
-                        user=user,
-                        view_count="",
-                    )
-                    tracks.append(track)
-                except Exception as e:
-                    # Skip individual track errors
-                    continue
-
-            return tracks
-        except KeyError as e:
-            # Handle YouTube API structure changes
-            raise Exception(
-                f"Failed to parse playlist. YouTube may have changed their structure.")
+            full = await self.search(self.base + track.id, track.message_id)
         except Exception as e:
-            # Re-raise other exceptions
-            raise
-
-    async def download(self, video_id: str, is_live: bool = False) -> Optional[str]:
-        url = self.base + video_id
-
+            logger.debug(f"Could not complete playlist entry {track.id}: {e}")
+            full = None
+        track.placeholder = False  # Only try once
+        if full and full.id == track.id:
+            track.view_count = full.view_count
+            track.channel_name = track.channel_name or full.channel_name
+            track.thumbnail = full.thumbnail or track.thumbnail
+            track.is_live = full.is_live
+        return track
+
+    async def download(
+        self,
+        video_id: str,
+        is_live: bool = False,
+        priority: Priority = Priority.PLAY,
+        progressive: bool = False,
+    ) -> Optional[str]:
         # For live streams, extract the direct stream URL using yt-dlp with cookies
         if is_live:
-            cookie = self.get_cookies()
-            ydl_opts = {
-                "quiet": True,
-                "no_warnings": True,
-                "cookiefile": cookie,
-                "format": "bestaudio/best",
-            }
-
-            def _extract_url():
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    try:
-                        info = ydl.extract_info(url, download=False)
-                        return info.get("url") or info.get("manifest_url")
-                    except yt_dlp.utils.ExtractorError as ex:
-                        error_msg = str(ex)
-                        if "Sign in to confirm" in error_msg or "bot" in error_msg.lower():
-                            logger.error(
-                                "YouTube bot detection triggered. Please update cookies.")
-                        elif "not available" in error_msg.lower():
-                            logger.error(
-                                "Video format not available or region-blocked.")
-                        else:
-                            logger.error(
-                                "Live stream URL extraction failed: %s", ex)
-                        return None
-                    except yt_dlp.utils.DownloadError as ex:
-                        error_msg = str(ex)
-                        if "failed to load cookies" in error_msg.lower() or "netscape format" in error_msg.lower():
-                            logger.error(
-                                "❌ Corrupted cookie file detected for live stream, removing: %s", cookie)
-                            # Remove corrupted cookie
-                            if cookie and cookie in self.cookies:
-                                self.cookies.remove(cookie)
-                            try:
-                                os.remove(f"HasiiMusic/cookies/{cookie}")
-                            except:
-                                pass
-                        else:
-                            logger.error(
-                                "Unexpected error during live stream extraction: %s", ex)
-                        return None
-                    except Exception as ex:
-                        logger.error(
-                            "Unexpected error during live stream extraction: %s", ex)
-                        return None
-
-            stream_url = await asyncio.to_thread(_extract_url)
-            return stream_url if stream_url else url
+            return await self.stream_url(video_id, live=True) or self.base + video_id
 
         # Download audio file
         ext = "webm"
@@ -286,114 +383,372 @@ class YouTube:
                 logger.error(f"❌ Cannot create downloads directory: {e}")
                 return None
 
-        if Path(filename).exists():
+        # Cache hit: refresh its access time so it stays warm
+        transcoded = self.transcoder.path(video_id)
+        if os.path.exists(transcoded) and cache.lookup(os.path.basename(transcoded)):
+            return transcoded
+        if cache.lookup(f"{video_id}.{ext}"):
+            # Played again: worth converting for cheaper starts next time
+            self.transcoder.submit(video_id, filename)
+            self.loudness.submit(video_id, filename)
             return filename
 
-        # **PERFORMANCE FIX**: Use semaphore to limit concurrent downloads
-        # Prevents bandwidth saturation when 15-20 groups download simultaneously
-        async with self._download_semaphore:
-            cookie = self.get_cookies()
-            base_opts = {
-                "outtmpl": "downloads/%(id)s.%(ext)s",
-                "quiet": True,
-                "noplaylist": True,
-                "geo_bypass": True,
-                "no_warnings": True,
-                "overwrites": False,
-                "nocheckcertificate": True,
-                "cookiefile": cookie,
-                "continuedl": True,
-                "noprogress": True,
-                # **PERFORMANCE FIX**: Reduced to 4 fragments for maximum stability
-                # 4 fragments × 5 concurrent downloads = 20 total connections (prevents bandwidth saturation)
-                # Lower = more stable but slightly slower downloads (trade-off for zero lag)
-                "concurrent_fragment_downloads": 4,
-                "http_chunk_size": 524288,  # 512KB chunks (smaller = more stable streaming)
-                "socket_timeout": 30,  # Increased from 15s (prevents timeout on slow networks)
-                "retries": 2,  # Increased from 1 (better reliability)
-                "fragment_retries": 2,  # Increased from 1 (handle network hiccups)
-                "ignoreerrors": True,
-            }
-
-            # High-quality audio: Opus codec in WebM container for best quality
-            ydl_opts = {
-                **base_opts,
-                "format": "bestaudio[ext=webm][acodec=opus]/bestaudio[acodec=opus]/bestaudio",
-                "postprocessors": [],  # No post-processing to preserve original quality
-            }
-
-            def _download():
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    try:
-                        ydl.download([url])
-                        # Check if file was actually downloaded (handle .part rename issues)
-                        if not Path(filename).exists():
-                            # Wait for filesystem operations to complete
-                            import time
-                            import glob
-                            time.sleep(3.0)  # Longer wait for slower filesystems
-                            if Path(filename).exists():
-                                return filename
-                            
-                            # Try to find .part file and rename it
-                            part_file = Path(f"{filename}.part")
-                            if part_file.exists():
-                                try:
-                                    import shutil
-                                    shutil.move(str(part_file), filename)
-                                    logger.info(f"✅ Renamed {part_file} to {filename}")
+        # Direct mode: stream the googlevideo URL, keep disk for replays
+        if config.STREAM_MODE == "direct":
+            return await self._direct(video_id, filename, priority)
+
+        # Start playback from the growing .part file instead of waiting
+        if progressive and config.PROGRESSIVE_PLAY:
+            return await self._download_progressive(video_id, filename, priority)
+
+        return await self._fetch(video_id, filename, priority)
+
+    def was_preempted(self, video_id: str) -> bool:
+        """
+        Check (once) whether a video's last download gave way to urgent work.
+
+        Tells a preempted speculative download, which returns None, apart
+        from a failed one.
+        """
+        return self._preempted.pop(video_id, False)
+
+    def cancel(self, video_id: str) -> bool:
+        """
+        Stop a speculative download of a video that nobody waits for any more.
+
+        The download leaves the scheduler queue, or its thread is preempted
+        and gives its slot back once it has stopped writing. Downloads an
+        urgent caller waits for are left alone.
+
+        Args:
+            video_id: YouTube video ID
+
+        Returns:
+            bool: True if a download was found and cancelled
+        """
+        lease = self._leases.get(video_id)
+        if lease is None or lease.priority <= URGENT:
+            return False
+        self.scheduler.cancel(lease)
+        return True
+
+    async def _fetch(self, video_id: str, filename: str, priority: Priority) -> Optional[str]:
+        """Download a video to disk, sharing the run with concurrent callers."""
+        # Coalesce concurrent requests for the same video (from any chat) into
+        # one yt-dlp run instead of racing on the same .part file
+        lease = self._leases.get(video_id)
+        if lease is None:
+            lease = self._leases[video_id] = self.scheduler.lease(priority)
+            self._preempted.pop(video_id, None)
+        else:
+            # An urgent caller joining a queued preload lifts its priority
+            self.scheduler.promote(lease, priority)
+        return await self.inflight.run(
+            video_id, lambda: self._download_file(video_id, filename, lease)
+        )
+
+    async def _download_progressive(
+        self, video_id: str, filename: str, priority: Priority
+    ) -> Optional[str]:
+        """
+        Start a download and return once its first chunk is on disk.
+
+        Returns the growing .part path as soon as PROGRESSIVE_BUFFER bytes
+        have been written; the player reads it through a feed (see
+        core/progressive.py) while yt-dlp keeps appending to it. If the
+        download does not produce a growing .part
+        (e.g. fragmented formats) or stalls, falls back to waiting for the
+        complete file.
+        """
+        # The download keeps running (and registers itself in the cache)
+        # after we hand the partial file to the player
+        task = asyncio.ensure_future(self._fetch(video_id, filename, priority))
+        part = Path(f"{filename}.part")
+        loop = asyncio.get_event_loop()
+        last_size, last_growth = 0, loop.time()
+
+        while not task.done():
+            size = part.stat().st_size if part.exists() else 0
+            if size >= config.PROGRESSIVE_BUFFER:
+                logger.debug(f"Progressive start for {video_id} at {size // 1024}KB")
+                self.feeds.track(str(part), task)
+                return str(part)
+            if size > last_size:
+                last_size, last_growth = size, loop.time()
+            elif loop.time() - last_growth > config.PROGRESSIVE_STALL:
+                logger.info(f"Progressive download of {video_id} stalled, waiting for full file")
+                break
+            await asyncio.wait({task}, timeout=0.25)
+
+        return await task
+
+    async def _direct(self, video_id: str, filename: str, priority: Priority) -> Optional[str]:
+        """
+        Return a direct audio URL for playback instead of downloading.
+
+        Tracks that keep being played (DIRECT_REPLAY plays) are downloaded
+        in the background at the lowest priority so later replays come
+        from disk. Falls back to a normal download if no URL resolves.
+        """
+        if priority <= URGENT:
+            self._plays[video_id] += 1
+            if self._plays[video_id] >= config.DIRECT_REPLAY and not self.inflight.in_flight(video_id):
+                task = asyncio.create_task(self._fetch(video_id, filename, Priority.PREFETCH))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            if len(self._plays) > 10000:
+                # Keep only tracks that are actually replayed
+                self._plays = Counter({k: v for k, v in self._plays.items() if v > 1})
+
+        url = await self.stream_url(video_id)
+        if url:
+            return url
+        logger.warning(f"⚠️ Could not resolve direct URL for {video_id}, downloading instead")
+        return await self._fetch(video_id, filename, priority)
+
+    async def stream_url(self, video_id: str, live: bool = False) -> Optional[str]:
+        """
+        Return a playable URL for a video, resolving it if needed.
+
+        URLs are cached until shortly before the expiry embedded in them
+        (see core/streams.py), so seeks and replays only pay for extraction
+        once the URL is stale.
+
+        Args:
+            video_id: YouTube video ID
+            live: Resolve the live stream instead of the audio-only file
+        """
+        return await self.streams.get(video_id, "live" if live else "audio")
+
+    async def _resolve_url(self, video_id: str, fmt: str) -> Optional[str]:
+        """Extract a stream URL for the given format profile ("audio" or "live")."""
+        if fmt == "live":
+            return await self._extract_live(video_id)
+
+        url = self.base + video_id
+        cookie = self.get_cookies()
+
+        def _extract():
+            started = time.monotonic()
+            try:
+                with self.extractors.lease("audio", AUDIO_URL_OPTS, cookie) as ydl:
+                    stream_url = ydl.extract_info(url, download=False).get("url")
+                if stream_url:
+                    self.cookies.report(cookie, ok=True, latency=time.monotonic() - started)
+                return stream_url
+            except yt_dlp.utils.YoutubeDLError as ex:
+                error_msg = str(ex)
+                bot = self._is_bot_check(error_msg)
+                # Private, removed or region-blocked videos say nothing about the cookie
+                if bot or self._is_auth_error(error_msg):
+                    self.cookies.report(cookie, ok=False, bot=bot)
+                if bot:
+                    logger.warning(f"⚠️ YouTube bot detection for {video_id}. This is temporary.")
+                else:
+                    logger.error("Direct URL extraction failed for %s: %s", video_id, ex)
+                return None
+            except Exception as ex:
+                logger.error("Unexpected error during direct URL extraction: %s", ex)
+                return None
+
+        return await executors.extract.run(_extract)
+
+    async def _extract_live(self, video_id: str) -> Optional[str]:
+        """Resolve the direct stream URL of a live video."""
+        url = self.base + video_id
+        cookie = self.get_cookies()
+
+        def _extract_url():
+            started = time.monotonic()
+            try:
+                with self.extractors.lease("live", LIVE_URL_OPTS, cookie) as ydl:
+                    info = ydl.extract_info(url, download=False)
+                stream_url = info.get("url") or info.get("manifest_url")
+                self.cookies.report(cookie, ok=bool(stream_url), latency=time.monotonic() - started)
+                return stream_url
+            except yt_dlp.utils.ExtractorError as ex:
+                error_msg = str(ex)
+                if self._is_bot_check(error_msg):
+                    self.cookies.report(cookie, ok=False, bot=True)
+                    logger.error(
+                        "YouTube bot detection triggered. Please update cookies.")
+                elif "not available" in error_msg.lower():
+                    logger.error(
+                        "Video format not available or region-blocked.")
+                else:
+                    logger.error(
+                        "Live stream URL extraction failed: %s", ex)
+                return None
+            except yt_dlp.utils.DownloadError as ex:
+                error_msg = str(ex)
+                if "failed to load cookies" in error_msg.lower() or "netscape format" in error_msg.lower():
+                    logger.error(
+                        "❌ Corrupted cookie file detected for live stream, removing: %s", cookie)
+                    # Remove corrupted cookie
+                    self._drop_cookie(cookie)
+                else:
+                    logger.error(
+                        "Unexpected error during live stream extraction: %s", ex)
+                return None
+            except Exception as ex:
+                logger.error(
+                    "Unexpected error during live stream extraction: %s", ex)
+                return None
+
+        return await executors.extract.run(_extract_url)
+
+    async def _download_file(self, video_id: str, filename: str, lease: Lease) -> Optional[str]:
+        """Download a video's audio to filename (one call per video at a time)."""
+        url = self.base + video_id
+        preempted = []  # Set by the progress hook when the scheduler preempts us
+
+        # **PERFORMANCE FIX**: Limit concurrent downloads, serving /play and
+        # play_next before speculative preloads (see core/scheduler.py)
+        try:
+            while True:
+                async with self.scheduler.slot(lease):
+                    if lease.cancelled:
+                        return None
+                    cookie = self.get_cookies()
+                    alloc = await self.tuner.acquire(self.scheduler.demand())
+                    started = time.monotonic()
+                    first_progress = []  # Time yt-dlp started transferring
+                    failure = []  # "bot" or "error" when the cookie is to blame
+
+                    def _on_progress(status):
+                        # Runs in the download thread on every progress update
+                        if not first_progress:
+                            first_progress.append(time.monotonic())
+                        self.tuner.observe(alloc, status)
+                        if lease.preempted:
+                            preempted.append(True)
+                            raise yt_dlp.utils.DownloadCancelled("preempted")
+
+                    def _download():
+                        try:
+                            with self.extractors.lease(
+                                "download", DOWNLOAD_OPTS, cookie, _on_progress, alloc.params
+                            ) as ydl:
+                                if ydl.download([url]):
+                                    # yt-dlp keeps reporting a failed run; start fresh next time
+                                    self.extractors.retire(ydl)
+                                    error_msg = self.extractors.last_error(ydl)
+                                    if self._is_bot_check(error_msg):
+                                        failure.append("bot")
+                                    elif "not available" not in error_msg.lower():
+                                        failure.append("error")
+                            # Check if file was actually downloaded (handle .part rename issues)
+                            if not Path(filename).exists():
+                                # Wait for filesystem operations to complete
+                                import time
+                                import glob
+                                time.sleep(3.0)  # Longer wait for slower filesystems
+                                if Path(filename).exists():
                                     return filename
-                                except Exception as rename_ex:
-                                    logger.error(f"❌ Failed to rename .part file: {rename_ex}")
-                                    return None
-                            
-                            # Try to find any variant of the file (different extension)
-                            video_id_pattern = str(Path(filename).stem)
-                            possible_files = glob.glob(f"downloads/{video_id_pattern}.*")
-                            if possible_files:
-                                # Use the first match
-                                found_file = possible_files[0]
-                                logger.info(f"✅ Found alternative file: {found_file}")
-                                return found_file
-                            
-                            logger.warning(f"⚠️ Download completed but file not found: {filename}")
+
+                                # Try to find .part file and rename it
+                                part_file = Path(f"{filename}.part")
+                                if part_file.exists():
+                                    try:
+                                        import shutil
+                                        shutil.move(str(part_file), filename)
+                                        logger.info(f"✅ Renamed {part_file} to {filename}")
+                                        return filename
+                                    except Exception as rename_ex:
+                                        logger.error(f"❌ Failed to rename .part file: {rename_ex}")
+                                        return None
+
+                                # Try to find any variant of the file (different extension)
+                                video_id_pattern = str(Path(filename).stem)
+                                possible_files = glob.glob(f"downloads/{video_id_pattern}.*")
+                                if possible_files:
+                                    # Use the first match
+                                    found_file = possible_files[0]
+                                    logger.info(f"✅ Found alternative file: {found_file}")
+                                    return found_file
+
+                                logger.warning(f"⚠️ Download completed but file not found: {filename}")
+                                return None
+                            return filename
+                        except yt_dlp.utils.DownloadCancelled:
+                            logger.debug(f"Download of {video_id} preempted by an urgent request")
+                            return None
+                        except yt_dlp.utils.ExtractorError as ex:
+                            error_msg = str(ex)
+                            if self._is_bot_check(error_msg):
+                                failure.append("bot")
+                                logger.warning(
+                                    f"⚠️ YouTube bot detection for {video_id}. This is temporary.")
+                            elif "not available" in error_msg.lower():
+                                logger.error(
+                                    "❌ Video not available: May be region-blocked or private.")
+                            elif "age" in error_msg.lower():
+                                failure.append("error")
+                                logger.error(
+                                    "❌ Age-restricted video: Cookies required.")
+                            else:
+                                failure.append("error")
+                                logger.error("❌ YouTube extraction failed: %s", ex)
+                            return None
+                        except yt_dlp.utils.DownloadError as ex:
+                            error_msg = str(ex)
+                            if "416" in error_msg or "Requested range not satisfiable" in error_msg:
+                                # HTTP 416 - file partially downloaded, delete and retry won't help
+                                logger.warning(f"⚠️ Range error for {video_id}, skipping")
+                            elif "failed to load cookies" in error_msg.lower() or "netscape format" in error_msg.lower():
+                                logger.error(
+                                    "❌ Corrupted cookie file detected, removing: %s", cookie)
+                                # Remove corrupted cookie from pool and filesystem
+                                self._drop_cookie(cookie)
+                            else:
+                                logger.warning(f"⚠️ Download error for {video_id}: {ex}")
+                            return None
+                        except Exception as ex:
+                            logger.warning(f"⚠️ Unexpected download error for {video_id}: {ex}")
                             return None
-                        return filename
-                    except yt_dlp.utils.ExtractorError as ex:
-                        error_msg = str(ex)
-                        if "Sign in to confirm" in error_msg or "bot" in error_msg.lower():
-                            logger.warning(
-                                f"⚠️ YouTube bot detection for {video_id}. This is temporary.")
-                        elif "not available" in error_msg.lower():
-                            logger.error(
-                                "❌ Video not available: May be region-blocked or private.")
-                        elif "age" in error_msg.lower():
-                            logger.error(
-                                "❌ Age-restricted video: Cookies required.")
-                        else:
-                            logger.error("❌ YouTube extraction failed: %s", ex)
-                        return None
-                    except yt_dlp.utils.DownloadError as ex:
-                        error_msg = str(ex)
-                        if "416" in error_msg or "Requested range not satisfiable" in error_msg:
-                            # HTTP 416 - file partially downloaded, delete and retry won't help
-                            logger.warning(f"⚠️ Range error for {video_id}, skipping")
-                        elif "failed to load cookies" in error_msg.lower() or "netscape format" in error_msg.lower():
-                            logger.error(
-                                "❌ Corrupted cookie file detected, removing: %s", cookie)
-                            # Remove corrupted cookie from list and filesystem
-                            if cookie and cookie in self.cookies:
-                                self.cookies.remove(cookie)
-                            try:
-                                os.remove(f"HasiiMusic/cookies/{cookie}")
-                            except:
-                                pass
-                        else:
-                            logger.warning(f"⚠️ Download error for {video_id}: {ex}")
-                        return None
-                    except Exception as ex:
-                        logger.warning(f"⚠️ Unexpected download error for {video_id}: {ex}")
-                        return None
 
-            # Run blocking download in thread pool to avoid blocking event loop
-            return await asyncio.get_event_loop().run_in_executor(None, _download)
+                    # Run blocking download in its own pool so renders cannot starve it
+                    job = asyncio.ensure_future(executors.downloads.run(_download))
+                    try:
+                        result = await asyncio.shield(job)
+                    except asyncio.CancelledError:
+                        # The thread cannot be killed: stop it at its next
+                        # progress update and keep the slot until it has let
+                        # go of the .part file, so no second writer starts
+                        lease.preempted = True
+                        while not job.done():
+                            try:
+                                await asyncio.shield(job)
+                            except asyncio.CancelledError:
+                                continue
+                            except Exception:
+                                break
+                        self.tuner.release(alloc, ok=True)
+                        if not job.cancelled() and not job.exception() and job.result():
+                            # Finished before it saw the flag; keep the file
+                            cache.add(job.result())
+                            self.loudness.submit(video_id, job.result())
+                        raise
+                    self.tuner.release(alloc, ok=result is not None or bool(preempted))
+                    if result:
+                        latency = (first_progress[0] if first_progress else time.monotonic()) - started
+                        self.cookies.report(cookie, ok=True, latency=latency)
+                    elif failure:
+                        self.cookies.report(cookie, ok=False, bot=failure[0] == "bot")
+                    if result:
+                        # Register the new file and evict cold tracks if over budget
+                        cache.add(result)
+                        self.loudness.submit(video_id, result)
+
+                # A preempted preload that an urgent caller joined meanwhile
+                # is resumed (continuedl picks up the .part file)
+                if preempted and lease.priority <= URGENT:
+                    preempted.clear()
+                    continue
+                if preempted and not result and not lease.cancelled:
+                    self._preempted[video_id] = True
+                    while len(self._preempted) > 1000:
+                        self._preempted.pop(next(iter(self._preempted)))
+                return result
+        finally:
+            self._leases.pop(video_id, None)
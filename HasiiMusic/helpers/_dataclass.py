@@ -41,3 +41,4 @@ class Track:
     user: str = None
     view_count: str = None
     is_live: bool = False
+    placeholder: bool = False  # Playlist entry still missing search metadata
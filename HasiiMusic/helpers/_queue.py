@@ -101,6 +101,15 @@ class Queue:
         queue_list = list(self.queues[chat_id])
         return queue_list[1:min(len(queue_list), count + 1)]
     
+    def active_ids(self) -> set[str]:
+        """Return the IDs of every playing or queued item across all chats."""
+        return {
+            item.id
+            for items in list(self.queues.values())
+            for item in list(items)
+            if item.id
+        }
+
     @staticmethod
     def is_downloaded(item: MediaItem) -> bool:
         """
@@ -75,8 +75,7 @@ async def _restart(_, m: types.Message):
     
     sent = await m.reply_text(m.lang["restarting"])
 
-    for directory in ["cache", "downloads"]:
-        shutil.rmtree(directory, ignore_errors=True)
+    # downloads/ and cache/ (thumbnails) are size-bounded and survive restarts
 
     await sent.edit_text(m.lang["restarted"])
     asyncio.create_task(stop())
@@ -147,8 +146,8 @@ async def _update(_, m: types.Message):
             "<blockquote>Bot will be back online shortly...</blockquote>"
         )
         
-        for directory in ["cache", "downloads"]:
-            shutil.rmtree(directory, ignore_errors=True)
+        # The thumbnail design may have changed; render them again
+        shutil.rmtree("cache", ignore_errors=True)
         
         asyncio.create_task(stop())
         await asyncio.sleep(2)
@@ -19,7 +19,7 @@ from functools import wraps
 from pyrogram import filters, types
 from pyrogram.errors import FloodWait
 
-from HasiiMusic import tune, app, config, db, lang, logger, queue, tg, yt
+from HasiiMusic import tune, app, config, db, lang, logger, preload, queue, tg, yt
 from HasiiMusic.helpers import admin_check, buttons, can_manage_vc
 
 
@@ -176,7 +176,7 @@ async def _controls(_, query: types.CallbackQuery):
 
         msg = await app.send_message(chat_id=chat_id, text=query.lang["play_next"])
         if not media.file_path:
-            media.file_path = await yt.download(media.id)
+            media.file_path = await yt.download(media.id, progressive=True)
         media.message_id = msg.id
         return await tune.play_media(chat_id, msg, media)
 
@@ -355,6 +355,9 @@ async def handle_shuffle(query: types.CallbackQuery, chat_id: int, user: str):
         queue.add(chat_id, current)
     for item in remaining:
         queue.add(chat_id, item)
+
+    # Preload the new upcoming tracks, cancel the ones that moved back
+    asyncio.create_task(preload.start_preload(chat_id))
     
     await query.answer("🔀 ǫᴜᴇᴜᴇ ꜱʜᴜꜰꜰʟᴇᴅ!", show_alert=False)
     await query.message.reply_text(
@@ -20,7 +20,7 @@ import time
 import pyrogram
 from pyrogram import enums, filters, types
 
-from HasiiMusic import tune, app, config, db, lang, logger, queue, tasks, userbot, yt
+from HasiiMusic import tune, app, config, db, lang, logger, preload, queue, tasks, userbot
 from HasiiMusic.helpers import buttons
 
 
@@ -118,13 +118,6 @@ async def update_timer(length=10):
     """Update progress bar every 20 seconds for all active chats independently."""
     chat_tasks = {}  # Track individual chat update tasks
 
-    async def _preload_next(chat_id, next_media):
-        """Pre-download next song without blocking timer updates."""
-        try:
-            next_media.file_path = await yt.download(next_media.id)
-        except Exception as e:
-            print(f"Preload error for chat {chat_id}: {e}")
-
     async def update_chat_timer(chat_id):
         """Update timer for a specific chat every 20 seconds."""
         while True:
@@ -139,6 +132,9 @@ async def update_timer(length=10):
                 if not media:
                     break
 
+                # The lookahead grows as the current track plays out
+                await preload.start_preload(chat_id)
+
                 # Ensure media.time is initialized
                 if not hasattr(media, 'time') or media.time is None:
                     media.time = 0
@@ -158,12 +154,6 @@ async def update_timer(length=10):
                 filled = int(round(bar_length * percentage / 100))
                 timer_bar = "—" * filled + "●" + "—" * (bar_length - filled)
 
-                # Pre-download next song if needed (don't block timer update)
-                if remaining <= 30:
-                    next = queue.get_next(chat_id, check=True)
-                    if next and not next.file_path:
-                        asyncio.create_task(_preload_next(chat_id, next))
-
                 if remaining < 10:
                     remove = True
                     timer_text = timer_bar
@@ -13,12 +13,14 @@
 from pyrogram import filters, types
 from pyrogram.errors import ChatAdminRequired
 
-from HasiiMusic import app, config
+from HasiiMusic import app, chat_cache, config
 
 
 @app.on_message(filters.new_chat_members & filters.group)
 async def new_chat_member(_, message: types.Message):
     """Handler for when bot is added to a new group"""
+    # Members changed (maybe an assistant); cached membership is stale
+    chat_cache.invalidate(message.chat.id)
 
     # Check if the bot itself was added
     for member in message.new_chat_members:
@@ -64,6 +66,7 @@ async def new_chat_member(_, message: types.Message):
 @app.on_message(filters.left_chat_member & filters.group)
 async def left_chat_member(_, message: types.Message):
     """Handler for when bot is removed from a group"""
+    chat_cache.invalidate(message.chat.id)
 
     # Check if the bot itself was removed
     if message.left_chat_member.id == app.id:
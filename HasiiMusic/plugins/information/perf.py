@@ -0,0 +1,172 @@
+# ==============================================================================
+# perf.py - Performance Metrics Command (Sudo Only)
+# ==============================================================================
+# This plugin shows where the bot spends its time so pool sizes and cache
+# budgets can be tuned.
+#
+# Commands:
+# - /perf - Show worker pool, download and cache metrics
+# - /cookies - Show health of every YouTube cookie file
+#
+# Displays:
+# - Worker pools: queue depth, running jobs, wait and run latency
+# - Download scheduler: waiting/running downloads per priority class
+# - Connection budget use, throughput and error rate of downloads
+# - In-flight downloads and coalesced callers
+# - Track transitions: gapless vs regular switches and silence between tracks
+# - Preloads: running jobs, hit rate of play_next, cancelled and shared ones
+# - Shared HTTP client: requests, retries, latency, connection reuse
+# - Download, thumbnail, search, stream URL, playlist, Opus transcode, loudness and chat caches
+# - Cookie score, success/bot-check rates, latency and quarantine
+#
+# Only sudo users can use this command.
+# ==============================================================================
+
+from pyrogram import filters, types
+
+from HasiiMusic import app, cache, chat_cache, executors, http, lang, photo_ids, preload, thumb_cache, tune, yt
+
+
+def _pools() -> str:
+    lines = []
+    for name, s in executors.stats().items():
+        lines.append(
+            f"<b>{name}</b> ({s['workers']} {'processes' if s['processes'] else 'threads'}): "
+            f"{s['running']} running, {s['queued']} queued\n"
+            f"  wait {s['avg_wait'] * 1000:.0f}/{s['max_wait'] * 1000:.0f}ms, "
+            f"run {s['avg_run']:.2f}/{s['max_run']:.2f}s, "
+            f"{s['completed']} done, {s['failed']} failed"
+        )
+    return "\n".join(lines)
+
+
+def _downloads() -> str:
+    sched = yt.scheduler.stats()
+    lines = [f"slots: {sched['running']}/{sched['slots']} busy, {sched['waiting']} waiting"]
+    for name, s in sched["classes"].items():
+        lines.append(
+            f"<b>{name}</b>: {s['running']} running, {s['waiting']} waiting, "
+            f"avg wait {s['avg_wait']:.1f}s, {s['preempted']} preempted"
+        )
+    tuner = yt.tuner.stats()
+    lines.append(
+        f"connections: {tuner['allocated']}/{tuner['budget']}, "
+        f"{tuner['speed'] / 1024 ** 2:.1f}MB/s avg, {tuner['errors'] * 100:.0f}% errors, "
+        f"{tuner['waited']} waited"
+    )
+    gaps = tune.transitions.stats()
+    lines.append(
+        f"transitions: {gaps['fast']} gapless, {gaps['slow']} regular, "
+        f"gap avg {gaps['avg_gap'] * 1000:.0f}ms (gapless {gaps['avg_fast'] * 1000:.0f}ms, "
+        f"regular {gaps['avg_slow'] * 1000:.0f}ms), max {gaps['max_gap'] * 1000:.0f}ms"
+    )
+    pre = preload.stats()
+    lines.append(
+        f"preload: {pre['jobs']}/{pre['max_jobs']} pending, {pre['budget']} at once, "
+        f"window avg {pre['avg_window']:.1f} tracks ({pre['ahead']}s, max {pre['depth']}), "
+        f"{pre['capped']} capped, "
+        f"{pre['hit_rate'] * 100:.0f}% hit rate ({pre['hits']}/{pre['hits'] + pre['misses']}), "
+        f"{pre['completed']} done, {pre['failed']} failed, {pre['cancelled']} cancelled, "
+        f"{pre['preempted']} preempted, {pre['deduped']} shared"
+    )
+    flight = yt.inflight.stats()
+    lines.append(
+        f"in flight: {flight['in_flight']} ({flight['waiters']} waiters), "
+        f"{flight['coalesced']} coalesced of {flight['started'] + flight['coalesced']}"
+    )
+    return "\n".join(lines)
+
+
+def _http() -> str:
+    s = http.stats()
+    return (
+        f"{s['requests']} requests, {s['retried']} retried, {s['failures']} failed, "
+        f"avg {s['avg_latency'] * 1000:.0f}ms, {s['bytes'] / 1024 ** 2:.1f}MB\n"
+        f"connections: {s['connections']} opened, {s['reused']} reused\n"
+        f"dns: {s['dns_hits']} cached, {s['dns_misses']} resolved"
+    )
+
+
+def _caches() -> str:
+    files = cache.stats()
+    search = yt.search_cache.stats()
+    streams = yt.streams.stats()
+    pool = yt.extractors.stats()
+    lists = yt.playlists.stats()
+    opus = yt.transcoder.stats()
+    loud = yt.loudness.stats()
+    chats = chat_cache.stats()
+    thumbs = thumb_cache.stats()
+    photos = photo_ids.stats()
+    return (
+        f"<b>downloads</b>: {files['files']} files, "
+        f"{files['bytes'] / 1024 ** 2:.0f}/{files['budget'] / 1024 ** 2:.0f}MB, "
+        f"{files['hits']} hits, {files['misses']} misses, {files['evictions']} evicted\n"
+        f"<b>thumbnails</b>: {thumbs['files']} files, "
+        f"{thumbs['bytes'] / 1024 ** 2:.1f}/{thumbs['budget'] / 1024 ** 2:.0f}MB, "
+        f"{thumbs['hits']} hits, {thumbs['misses']} misses, {thumbs['evictions']} evicted\n"
+        f"<b>file_ids</b>: {photos['known']} known, {photos['reused']} reused, "
+        f"{photos['uploaded']} uploaded, {photos['stale']} stale\n"
+        f"<b>search</b>: {search['entries']} entries, {search['hits']} hits, "
+        f"{search['db_hits']} db hits, {search['misses']} misses\n"
+        f"<b>stream urls</b>: {streams['entries']} entries, {streams['hits']} hits, "
+        f"{streams['misses']} misses, {streams['refreshes']} refreshed\n"
+        f"<b>playlists</b>: {lists['listings']} cached, {lists['hits']} hits, "
+        f"{lists['misses']} misses, {lists['pages']} pages, {lists['pending']} chats pending\n"
+        f"<b>opus</b>: {'on' if opus['enabled'] else 'off'}, {opus['done']} converted, "
+        f"{opus['running']} running, {opus['failed']} failed, {opus['hits']} plays\n"
+        f"<b>loudness</b>: {'on' if loud['enabled'] else 'off'} ({loud['target']:.0f} LUFS), "
+        f"{loud['known']} known, {loud['analyzed']} analyzed, {loud['failed']} failed, "
+        f"{loud['applied']} applied\n"
+        f"<b>chats</b>: {chats['chats']} chats, {chats['members']} memberships, "
+        f"{chats['hits']} hits, {chats['misses']} misses, {chats['invalidations']} invalidated\n"
+        f"<b>yt-dlp</b>: {pool['idle']} idle, {pool['created']} created, "
+        f"{pool['reused']} reused, {pool['recycled']} recycled"
+    )
+
+
+@app.on_message(filters.command(["perf"]) & app.sudo_filter)
+@lang.language()
+async def _perf(_, m: types.Message):
+    # Auto-delete command message
+    try:
+        await m.delete()
+    except Exception:
+        pass
+
+    text = (
+        "<u><b>⚙️ ᴡᴏʀᴋᴇʀ ᴘᴏᴏʟꜱ:</b></u>\n"
+        f"<blockquote>{_pools()}</blockquote>\n\n"
+        "<u><b>📥 ᴅᴏᴡɴʟᴏᴀᴅꜱ:</b></u>\n"
+        f"<blockquote>{_downloads()}</blockquote>\n\n"
+        "<u><b>🌐 ʜᴛᴛᴘ:</b></u>\n"
+        f"<blockquote>{_http()}</blockquote>\n\n"
+        "<u><b>🗄️ ᴄᴀᴄʜᴇꜱ:</b></u>\n"
+        f"<blockquote>{_caches()}</blockquote>"
+    )
+    await m.reply_text(text)
+
+
+@app.on_message(filters.command(["cookies"]) & app.sudo_filter)
+@lang.language()
+async def _cookies(_, m: types.Message):
+    # Auto-delete command message
+    try:
+        await m.delete()
+    except Exception:
+        pass
+
+    cookies = yt.cookies.stats()
+    if not cookies:
+        return await m.reply_text("<blockquote>❌ No cookie files loaded</blockquote>")
+
+    lines = []
+    for name, s in sorted(cookies.items(), key=lambda item: -item[1]["score"]):
+        state = f"🚫 {s['quarantine'] / 60:.0f}m" if s["quarantine"] else "✅"
+        lines.append(
+            f"{state} <b>{name}</b>: score {s['score']:.2f}\n"
+            f"  {s['uses']} uses, {s['success'] * 100:.0f}% ok, "
+            f"{s['bot_checks']} bot checks, {s['latency']:.1f}s latency"
+        )
+    body = "\n".join(lines)
+    await m.reply_text(f"<u><b>🍪 ᴄᴏᴏᴋɪᴇ ᴘᴏᴏʟ:</b></u>\n<blockquote>{body}</blockquote>")
@@ -195,8 +195,9 @@ async def play_hndlr(
         if "playlist" in url:
             await safe_edit(sent, m.lang["playlist_fetch"])
             try:
-                tracks = await yt.playlist(
-                    config.PLAYLIST_LIMIT, mention, url
+                # First batch only; the rest is queued as the queue runs low
+                tracks = await yt.playlists.start(
+                    chat_id, url, config.PLAYLIST_LIMIT, mention
                 )
             except Exception as e:
                 await safe_edit(
@@ -214,6 +215,7 @@ async def play_hndlr(
             file = tracks[0]
             tracks.remove(file)
             file.message_id = sent.id
+            file = await yt.materialize(file)
         else:
             file = await yt.search(url, sent.id)
 
@@ -285,7 +287,7 @@ async def play_hndlr(
             # ✨ NEW: Start preloading queued tracks in background
             try:
                 from HasiiMusic import preload
-                asyncio.create_task(preload.start_preload(chat_id, count=2))
+                asyncio.create_task(preload.start_preload(chat_id))
             except Exception:
                 # Non-critical, continue without preload
                 pass
@@ -293,7 +295,9 @@ async def play_hndlr(
             return
 
     if not file.file_path:
-        file.file_path = await yt.download(file.id, is_live=file.is_live)
+        file.file_path = await yt.download(
+            file.id, is_live=file.is_live, progressive=True
+        )
         if not file.file_path:
             await safe_edit(
                 sent,
@@ -14,9 +14,9 @@
 # - Queue length and total duration
 # ==============================================================================
 
-from pyrogram import filters, types
+from pyrogram import errors, filters, types
 
-from HasiiMusic import app, config, db, lang, queue
+from HasiiMusic import app, config, db, lang, photo_ids, queue
 from HasiiMusic.helpers import Track, buttons, thumb
 
 
@@ -59,14 +59,26 @@ async def _queue_func(_, m: types.Message):
         _text += "</blockquote>"
 
     _playing = await db.playing(m.chat.id)
-    await _reply.edit_media(
-        media=types.InputMediaPhoto(
-            media=_thumb,
-            caption=_text,
-        ),
-        reply_markup=buttons.queue_markup(
-            m.chat.id,
-            m.lang["playing"] if _playing else m.lang["paused"],
-            _playing,
-        ),
+    _markup = buttons.queue_markup(
+        m.chat.id,
+        m.lang["playing"] if _playing else m.lang["paused"],
+        _playing,
     )
+    # Reference an earlier upload of the thumbnail instead of uploading it again
+    _file_id = await photo_ids.get(_thumb)
+    try:
+        edited = await _reply.edit_media(
+            media=types.InputMediaPhoto(media=_file_id or _thumb, caption=_text),
+            reply_markup=_markup,
+        )
+    except errors.BadRequest as e:
+        if not _file_id or not photo_ids.is_stale(e):
+            raise
+        await photo_ids.forget(_thumb)
+        _file_id = None
+        edited = await _reply.edit_media(
+            media=types.InputMediaPhoto(media=_thumb, caption=_text),
+            reply_markup=_markup,
+        )
+    if not _file_id:
+        await photo_ids.remember(_thumb, edited)
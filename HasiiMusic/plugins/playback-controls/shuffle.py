@@ -11,10 +11,11 @@
 # - Queue must have at least 2 tracks
 # ==============================================================================
 
+import asyncio
 import random
 from pyrogram import filters, types
 
-from HasiiMusic import app, db, lang, queue
+from HasiiMusic import app, db, lang, preload, queue
 from HasiiMusic.helpers import can_manage_vc
 
 
@@ -49,5 +50,8 @@ async def _shuffle(_, m: types.Message):
         queue.add(m.chat.id, current)
     for item in remaining:
         queue.add(m.chat.id, item)
+
+    # Preload the new upcoming tracks, cancel the ones that moved back
+    asyncio.create_task(preload.start_preload(m.chat.id))
     
     await m.reply_text(f"🔀 Queue **shuffled**! ({len(remaining)} tracks randomized)")
@@ -64,8 +64,88 @@ class Config:
         self.DURATION_LIMIT: int = int(getenv("DURATION_LIMIT", "300")) * 60
         # Max songs in queue (default: 30)
         self.QUEUE_LIMIT: int = int(getenv("QUEUE_LIMIT", "30"))
-        # Max songs from playlist (default: 20)
-        self.PLAYLIST_LIMIT: int = int(getenv("PLAYLIST_LIMIT", "20"))
+        # Max songs from playlist, queued in batches as playback goes on (default: 200)
+        self.PLAYLIST_LIMIT: int = int(getenv("PLAYLIST_LIMIT", "200"))
+        # Minutes a fetched playlist page is reused (default: 30)
+        self.PLAYLIST_CACHE_TTL: int = int(getenv("PLAYLIST_CACHE_TTL", "30")) * 60
+
+        # ============ DOWNLOAD CACHE ============
+        # Disk budget for downloads/ in MB (default: 2048, 0 = unlimited)
+        self.CACHE_LIMIT: int = int(getenv("CACHE_LIMIT", "2048")) * 1024 * 1024
+        # Eviction policy when over budget: "lru" or "lfu" (default: lru)
+        self.CACHE_POLICY: str = getenv("CACHE_POLICY", "lru").lower()
+
+        # ============ STREAM MODE ============
+        # "download": save tracks to downloads/ before playing (default)
+        # "direct": stream the YouTube audio URL, only download replayed tracks
+        self.STREAM_MODE: str = getenv("STREAM_MODE", "download").lower()
+        # In direct mode, download a track once it has been played this often
+        self.DIRECT_REPLAY: int = int(getenv("DIRECT_REPLAY", "2"))
+
+        # ============ PROGRESSIVE PLAYBACK ============
+        # Start playing while the track is still downloading (default: False)
+        self.PROGRESSIVE_PLAY: bool = self._str_to_bool(getenv("PROGRESSIVE_PLAY", "False"))
+        # KB that must be on disk before playback starts (default: 384)
+        self.PROGRESSIVE_BUFFER: int = int(getenv("PROGRESSIVE_BUFFER", "384")) * 1024
+        # Seconds without download progress before falling back (default: 10)
+        self.PROGRESSIVE_STALL: int = int(getenv("PROGRESSIVE_STALL", "10"))
+
+        # ============ GAPLESS TRANSITIONS ============
+        # Seconds before a track ends to prepare the next one for a gapless switch (default: 10)
+        self.TRANSITION_LEAD: int = int(getenv("TRANSITION_LEAD", "10"))
+
+        # ============ PRELOAD ============
+        # Seconds of upcoming audio kept downloaded per chat (default: 600)
+        self.PRELOAD_AHEAD: int = int(getenv("PRELOAD_AHEAD", "600"))
+        # Most upcoming tracks downloaded in advance per chat (default: 5)
+        self.PRELOAD_DEPTH: int = int(getenv("PRELOAD_DEPTH", "5"))
+        # Pending preloads (all chats) beyond which chats only preload their next track (default: 10)
+        self.PRELOAD_MAX_JOBS: int = int(getenv("PRELOAD_MAX_JOBS", "10"))
+        # Preload downloads running at once across all chats (default: 3)
+        self.PRELOAD_BUDGET: int = int(getenv("PRELOAD_BUDGET", "3"))
+
+        # ============ WORKER POOLS ============
+        # Threads (and simultaneous downloads) for yt-dlp downloads (default: 5)
+        self.DOWNLOAD_WORKERS: int = int(getenv("DOWNLOAD_WORKERS", "5"))
+        # Connections shared by all running downloads (default: 20)
+        self.CONNECTION_BUDGET: int = int(getenv("CONNECTION_BUDGET", "20"))
+        # Threads for resolving direct/live stream URLs (default: 4)
+        self.EXTRACT_WORKERS: int = int(getenv("EXTRACT_WORKERS", "4"))
+        # Threads for rendering thumbnails (default: 2)
+        self.RENDER_WORKERS: int = int(getenv("RENDER_WORKERS", "2"))
+        # Render thumbnails in worker processes instead of threads (multi-core hosts, default: False)
+        self.RENDER_PROCESSES: bool = self._str_to_bool(getenv("RENDER_PROCESSES", "False"))
+
+        # ============ TRANSCODE CACHE ============
+        # Convert tracks played again into Opus files that start faster (default: False)
+        self.TRANSCODE_CACHE: bool = self._str_to_bool(getenv("TRANSCODE_CACHE", "False"))
+        # ffmpeg processes converting tracks at once (default: 1)
+        self.TRANSCODE_WORKERS: int = int(getenv("TRANSCODE_WORKERS", "1"))
+
+        # ============ LOUDNESS ============
+        # Measure every track once and play all of them at the same loudness (default: False)
+        self.LOUDNESS_NORMALIZE: bool = self._str_to_bool(getenv("LOUDNESS_NORMALIZE", "False"))
+        # Loudness tracks are normalized to, in LUFS (default: -14, like YouTube)
+        self.LOUDNESS_TARGET: float = float(getenv("LOUDNESS_TARGET", "-14"))
+
+        # ============ HTTP CLIENT ============
+        # Open connections of the shared HTTP client, in total and per host (default: 100/20)
+        self.HTTP_CONNECTIONS: int = int(getenv("HTTP_CONNECTIONS", "100"))
+        self.HTTP_CONNECTIONS_PER_HOST: int = int(getenv("HTTP_CONNECTIONS_PER_HOST", "20"))
+        # Seconds before an outbound request times out (default: 15)
+        self.HTTP_TIMEOUT: int = int(getenv("HTTP_TIMEOUT", "15"))
+        # Extra attempts after a network error or 5xx answer (default: 2)
+        self.HTTP_RETRIES: int = int(getenv("HTTP_RETRIES", "2"))
+
+        # ============ SEARCH CACHE ============
+        # Search results kept in memory (default: 1000)
+        self.SEARCH_CACHE_SIZE: int = int(getenv("SEARCH_CACHE_SIZE", "1000"))
+        # Hours a search result stays valid in memory and MongoDB (default: 24)
+        self.SEARCH_CACHE_TTL: int = int(getenv("SEARCH_CACHE_TTL", "24")) * 3600
+
+        # ============ CHAT CACHE ============
+        # Minutes chat type and assistant membership are cached (default: 10)
+        self.CHAT_CACHE_TTL: int = int(getenv("CHAT_CACHE_TTL", "10")) * 60
 
         # ============ ASSISTANT/USERBOT SESSIONS ============
         # Pyrogram session strings - get from @StringFatherBot
@@ -93,10 +173,18 @@ class Config:
         self.AUTO_LEAVE: bool = self._str_to_bool(getenv("AUTO_LEAVE", "False"))
         # Enable/disable thumbnail generation (set False to use default thumb)
         self.THUMB_GEN: bool = self._str_to_bool(getenv("THUMB_GEN", "True"))
+        # Generated thumbnail format: jpeg, webp or png (default: jpeg)
+        self.THUMB_FORMAT: str = getenv("THUMB_FORMAT", "jpeg").lower()
+        # JPEG/WebP quality of generated thumbnails, 1-100 (default: 85)
+        self.THUMB_QUALITY: int = int(getenv("THUMB_QUALITY", "85"))
+        # MB of generated thumbnails kept in cache/, least recently used evicted first (default: 100)
+        self.THUMB_CACHE_LIMIT: int = int(getenv("THUMB_CACHE_LIMIT", "100")) * 1024 * 1024
 
         # ============ YOUTUBE COOKIES ============
         # Parse space-separated cookie URLs for age-restricted content
         self.COOKIES_URL: List[str] = self._parse_cookies()
+        # Minutes between cookie re-downloads from COOKIE_URL (default: 60, 0 = only at boot)
+        self.COOKIE_REFRESH: int = int(getenv("COOKIE_REFRESH", "60"))
 
         # ============ IMAGE URLS ============
         # URLs for various bot images